@@ -13,6 +13,7 @@ from typing import List, Optional, Union, Literal
 
 import discord
 import discord.ui as dui
+import numpy as np
 import polars as pl
 import polars.selectors as cs
 import portion as P
@@ -21,7 +22,7 @@ from discord.ext import commands
 from more_itertools import chunked, split_into, value_chain
 from sortedcontainers import SortedSet
 
-from compendium import COMPENDIUM_NOTES, CURRENT_SEASON, WheelCompendium
+from compendium import COMPENDIUM_NOTES, CURRENT_SEASON, LETTER_COLS, WheelCompendium
 from util_compendium import (
     CompendiumDownloader,
     build_puzzle_search_expr,
@@ -37,6 +38,7 @@ from util import (
     logic_expression,
     season_portion_str_2,
     send_long_mes,
+    send_long_table,
     TimeConverter,
 )
 from util_expr import pretty_print_polars as ppp, NUM_TO_MULT
@@ -47,7 +49,7 @@ SEASON_RANGE = commands.Range[int, 1, CURRENT_SEASON]
 PAGE_TYPE = SEASON_RANGE | Literal['primetime', 'kids', 'daytime', 'au', 'gb']
 
 
-def gen_compendium_submes(df: pl.DataFrame, time: str) -> str:
+def compendium_display_query(df: pl.DataFrame, time: str) -> pl.LazyFrame:
     if time == 'sched':
         q = df.lazy()
 
@@ -104,7 +106,7 @@ def gen_compendium_submes(df: pl.DataFrame, time: str) -> str:
         if wc:
             q = q.with_columns(wc)
 
-    return ppp(q.collect())
+    return q
 
 
 def compendium_admin_check(ctx):
@@ -294,7 +296,9 @@ class CompendiumCog(commands.Cog, name='Compendium'):
 
         async with ctx.typing():
             if options.conditions:
-                total_expr, expr_str, cond_descriptions, join = build_puzzle_search_expr(options)
+                total_expr, expr_str, cond_descriptions, join = build_puzzle_search_expr(
+                    options, self.wc.word_index[options.time], self.wc.trigram_index[options.time]
+                )
 
                 match join:
                     case 'sched':
@@ -339,6 +343,7 @@ class CompendiumCog(commands.Cog, name='Compendium'):
                 description_str = f'{sub_df.height} puzzles make up the whole table for {options.time.upper()} currently.'
 
             total_str = f'{description_str}\n\n'
+            table_q = None
 
             if options.random and options.random < sub_df.height:
                 total_str += f'{options.random} chosen randomly\n\n'
@@ -431,42 +436,36 @@ class CompendiumCog(commands.Cog, name='Compendium'):
                         else:
                             total_str += f'PUZZLE FREQUENCY: No puzzles that occurred more than {n} times.'
                     case ['MULT' | 'M', *discard]:
-                        agg_df = (
-                            sub_df.lazy()
-                            .select(pl.col('_lc').explode().struct.rename_fields(('LETTER', 'm')))
-                            .unnest('_lc')
-                            .group_by('LETTER')
-                            .agg(pl.col('m').value_counts())
-                            .explode('m')
-                            .unnest('m')
-                            .collect()
-                            .pivot(
-                                index='LETTER',
-                                columns='m',
-                                values='count',
-                                sort_columns=True,
-                            )
-                            .fill_null(0)
-                            .sort('LETTER')
-                        )
-
-                        agg_df = agg_df.select(
-                            'LETTER',
-                            (sub_df.height - pl.sum_horizontal(cs.numeric())).alias('Duds'),
-                            *(
-                                pl.col(f'{i}').alias(NUM_TO_MULT[i].title())
-                                for i in range(1, 13)
-                                if f'{i}' in agg_df.columns
-                            ),
+                        # one bincount over the letter count matrix, each letter's counts offset into its own bins
+                        counts = sub_df.select(LETTER_COLS).to_numpy().astype(np.int64)
+                        k = int(counts.max()) + 1
+                        table = np.bincount(
+                            (counts + k * np.arange(len(LETTER_COLS))).ravel(), minlength=k * len(LETTER_COLS)
+                        ).reshape(len(LETTER_COLS), k)
+                        present = table[:, 1:].any(axis=1)
+
+                        agg_df = pl.DataFrame(
+                            {
+                                'LETTER': [c for c, p in zip(string.ascii_uppercase, present) if p],
+                                'Duds': table[present, 0],
+                                **{
+                                    NUM_TO_MULT[i].title(): table[present, i]
+                                    for i in range(1, min(k, 13))
+                                    if table[:, i].any()
+                                },
+                            }
                         )
 
                         total_str += 'LETTER MULTIPLE TABLE\n\n' + ppp(agg_df)
                     case _:
-                        total_str += gen_compendium_submes(sub_df, options.time)
+                        table_q = compendium_display_query(sub_df, options.time)
             else:
                 total_str = description_str
 
-        await send_long_mes(ctx, total_str)
+        if table_q is not None:
+            await send_long_table(ctx, total_str.removesuffix('\n\n'), table_q)
+        else:
+            await send_long_mes(ctx, total_str)
 
     @wheelcompendium.command(aliases=['sc'], with_app_command=False)
     async def search_choices(self, ctx, *, options: SearchFlags):
@@ -489,7 +488,9 @@ class CompendiumCog(commands.Cog, name='Compendium'):
 
         async with ctx.typing():
             if options.conditions:
-                total_expr, expr_str, cond_descriptions = build_choices_search_expr(options)
+                total_expr, expr_str, cond_descriptions = build_choices_search_expr(
+                    options, self.wc.word_index[options.time], self.wc.trigram_index[options.time]
+                )
                 sub_df = await asyncio.to_thread(self.wc.df_choices[options.time].filter(total_expr).collect)
                 # _log.debug(f'\n{sub_df}')
                 plural = 's' if sub_df.height != 1 else ''
@@ -514,6 +515,7 @@ class CompendiumCog(commands.Cog, name='Compendium'):
                 description_str = f'{sub_df.height} BRs make up the whole table for {options.time.upper()} currently.'
 
             total_str = f'{description_str}\n\n'
+            table_q = None
 
             if options.random and options.random < sub_df.height:
                 total_str += f'{options.random} chosen randomly\n\n'
@@ -594,11 +596,14 @@ class CompendiumCog(commands.Cog, name='Compendium'):
 
                         total_str += f'CATEGORY CHOICE TABLE\n\n{ssss}'
                     case _:
-                        total_str += gen_compendium_submes(sub_df, options.time)
+                        table_q = compendium_display_query(sub_df, options.time)
             else:
                 total_str = description_str
 
-        await send_long_mes(ctx, total_str)
+        if table_q is not None:
+            await send_long_table(ctx, total_str.removesuffix('\n\n'), table_q)
+        else:
+            await send_long_mes(ctx, total_str)
 
     @wheelcompendium.command(aliases=['ss'], with_app_command=False)
     async def search_sched(self, ctx, *, options: SearchFlags):
@@ -641,17 +646,21 @@ class CompendiumCog(commands.Cog, name='Compendium'):
                 description_str = f'{sub_df.height} episodes make up the whole table for {options.time.upper()} currently.'
 
             total_str = f'{description_str}\n\n'
+            table_q = None
 
             if options.random and options.random < sub_df.height:
                 total_str += f'{options.random} chosen randomly\n\n'
                 sub_df = sub_df.sample(options.random)
 
             if sub_df.height:
-                total_str += gen_compendium_submes(sub_df, 'sched')
+                table_q = compendium_display_query(sub_df, 'sched')
             else:
                 total_str = description_str
 
-        await send_long_mes(ctx, total_str)
+        if table_q is not None:
+            await send_long_table(ctx, total_str.removesuffix('\n\n'), table_q)
+        else:
+            await send_long_mes(ctx, total_str)
 
     @wheelcompendium.command(aliases=['pc'], description='Gives the total puzzle count in the given seasons.')
     async def puzzle_count(
@@ -709,7 +718,9 @@ class CompendiumCog(commands.Cog, name='Compendium'):
         The bot will scan all users' messages for letters/puzzle guesses unless single=True is specified, then the bot will only respond to the command giver's messages.
         """
 
-        total_expr, _, _, _ = build_puzzle_search_expr(options)
+        total_expr, _, _, _ = build_puzzle_search_expr(
+            options, self.wc.word_index[options.time], self.wc.trigram_index[options.time]
+        )
 
         sub_df = await asyncio.to_thread(self.wc.dfs[options.time].filter(total_expr).collect)
         if not sub_df.height:
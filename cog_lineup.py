@@ -8,7 +8,7 @@ import traceback
 from collections import OrderedDict
 from copy import copy
 from datetime import *
-from functools import reduce
+from functools import partial, reduce
 from typing import List, Literal, Optional, Union
 
 import discord
@@ -29,6 +29,8 @@ from util import (
     PGConverter,
     PGGroupConverter,
     PGPlayingConverter,
+    QueryBatch,
+    QueryExecutor,
     TimeConverter,
     add_separator_lines,
     excel_date_str,
@@ -37,20 +39,23 @@ from util import (
     parse_time_options,
     season_portion_str,
     send_long_mes,
+    send_long_table,
     PLAYING_FLAGS,
     NAME_ATTRGET,
     SCHEDULER_TZ,
-    SORT_PROD,
     SEASON_RANGE,
     NONNEGATIVE_INT,
 )
 from util_expr import (
     build_flag_expr as has_any_flags,
     pretty_print_polars as ppp,
+    FixedWidthTable,
     build_lineup_expr,
     build_int_expression,
     build_date_expression,
     build_dt_q_expression,
+    compile_logic,
+    condition_aliases,
     transform_str_to_dts,
 )
 from util2 import SI
@@ -92,6 +97,10 @@ FLAGS_REGEX_4 = r'^([123456]):(.+)$'
 CONFLICTN_REGEX = '(max|m)'
 
 LINEUP_SEP = '\n\n' + (' '.join('~' * 22)) + '\n\n'
+
+# what lineup batch takes, by qualified name
+BATCHABLE = frozenset({'lineup search', 'played concurrence', 'played slots'})
+BATCH_MAX = 10
 BY_SEASON_UNCERTAIN_LABELS = ['PG^', 'PG?']
 
 ALL_PLINKO_FLAGS = frozenset({0} | {len(PLAYING_FLAGS) - PLAYING_FLAGS.index(f) for f in ('car', 'T', '$')})
@@ -191,7 +200,7 @@ def conflictNint(arg):
         return i
 
 
-async def trim_query(q: pl.LazyFrame, sortBy: str = 'prod', since: bool = False):
+async def trim_query(ctx, q: pl.LazyFrame, sortBy: str = 'prod', since: bool = False):
     if byDate := sortBy == 'date' and 'AIRDATE' in q.columns:
         q = q.sort('AIRDATE')
     if since:
@@ -212,10 +221,11 @@ async def trim_query(q: pl.LazyFrame, sortBy: str = 'prod', since: bool = False)
                 + pl.when(pl.col('SINCE') == 1).then(pl.lit(f' {extra}')).otherwise(pl.lit(f' {extra}s'))
             ).fill_null('')
         )
-    return await asyncio.to_thread(q.drop(cs.contains('_')).collect)
+    return await ctx.cog.queries.collect(ctx, q.drop(cs.contains('_')))
 
 
-def gen_lineup_submes(sub_df: pl.DataFrame, initial_str: str, time: str):
+def lineup_display_query(sub_df: pl.DataFrame, time: str) -> pl.LazyFrame:
+    # which columns to show is decided over all of sub_df, the formatting itself is left lazy
     q = sub_df.lazy()
 
     if notes_col := ('SPECIAL' if time == 'primetime' else '' if time == 'syndicated' else 'NOTES'):
@@ -237,10 +247,23 @@ def gen_lineup_submes(sub_df: pl.DataFrame, initial_str: str, time: str):
         elif half_hour_check.any():
             q = q.with_columns(pl.col('PG4', 'PG5', 'PG6').fill_null(''))
 
-    sub_df = q.collect()
+    return q
+
+
+async def batch_send(out: list, content=None, **kwargs):
+    # stands in for ctx.send in a batched command, its messages go into its part of the report (views & such are dropped)
+    if content:
+        out.append([content.strip('`').strip()])
 
-    sub_df_str = ppp(sub_df) if sub_df.height else '' if initial_str else 'None'
-    return f'{initial_str}\n\n{sub_df_str}' if initial_str else sub_df_str
+
+async def gen_lineup_parts(ctx, sub_df: pl.DataFrame, initial_str: str, time: str) -> list:
+    # message parts for send_long_mes, the table is left for it to render
+    table = (
+        FixedWidthTable(await ctx.cog.queries.collect(ctx, lineup_display_query(sub_df, time)))
+        if sub_df.height
+        else '' if initial_str else 'None'
+    )
+    return [initial_str, '\n\n', table] if initial_str else [table]
 
 
 class CSUpdateView(dui.View):
@@ -332,6 +355,7 @@ class ConflictNFlags(ConflictBaseFlags):
     N1: NONNEGATIVE_INT = 1
     N2: conflictNint = 'max'
     pgGroupCompare: PGGroupConverter = commands.flag(aliases=['pgGroup', 'compare'], default=None)
+    bySeason: NONNEGATIVE_INT = commands.flag(aliases=['by'], default=0)
 
 
 class ConflictFlags(ConflictBaseFlags):
@@ -390,6 +414,30 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
         self.latest_meta = {}
         self.latest_lock = asyncio.Lock()
         self.bot = bot
+        self.export_job = None
+        # every query a command runs goes through here, off the event loop
+        self.queries = QueryExecutor('lineup')
+
+    async def cog_load(self):
+        # the workbook on dropbox is only an export now, refresh it nightly if anything changed
+        self.export_job = self.bot.SCHEDULER.add_job(self.export_excel, 'cron', hour=4, minute=0)
+
+    async def cog_unload(self):
+        if self.export_job:
+            self.export_job.remove()
+        self.queries.shutdown()
+        if self.cs:
+            await asyncio.to_thread(self.cs.close)
+
+    async def export_excel(self):
+        if self.cs and self.cs.excel_stale:
+            _log.info('start exporting excel at ' + str(datetime.now()))
+            try:
+                await asyncio.to_thread(self.cs.save_excel)
+                _log.info('end exporting excel at ' + str(datetime.now()))
+            except Exception as e:
+                _log.error('failed to export excel at ' + str(datetime.now()))
+                traceback.print_tb(e.__traceback__)
 
     # bases
 
@@ -416,16 +464,22 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
         # _log.info(f'cog_lineup on_ready: fetched conflict_role as {self.conflict_role}')
 
     async def cog_before_invoke(self, ctx):
-        if not self.cs or not self.cs.is_ready():
+        # eras load lazily: only wait on the one this command reads (daytime unless it says otherwise).
+        # time can be a flag, a keyword or a positional parameter (ctx.args after the cog & ctx)
+        bound = dict(zip(ctx.command.clean_params, ctx.args[2:])) | ctx.kwargs
+        time = getattr(bound.get('options'), 'time', None) or bound.get('time') or 'daytime'
+        if not self.cs or not self.cs.is_ready(time):
             m = await ctx.send('`Lineups need to be reloaded, give me a moment...`')
-            dropboxfn = '/heroku/wayo-py/'
-            _log.info('start creating cs at ' + str(datetime.now()))
-            self.cs = await asyncio.to_thread(
-                ConflictSheet,
-                lambda fn: io.BytesIO(dropboxwayo.download(dropboxfn + fn)),
-                lambda iob, fn: dropboxwayo.upload(iob.getvalue(), dropboxfn + fn),
-            )
-            _log.info('end creating cs at ' + str(datetime.now()))
+            if not self.cs:
+                dropboxfn = '/heroku/wayo-py/'
+                _log.info('start creating cs at ' + str(datetime.now()))
+                self.cs = await asyncio.to_thread(
+                    ConflictSheet,
+                    lambda fn: io.BytesIO(dropboxwayo.download(dropboxfn + fn)),
+                    lambda iob, fn: dropboxwayo.upload(iob.getvalue(), dropboxfn + fn),
+                )
+                _log.info('end creating cs at ' + str(datetime.now()))
+            await asyncio.to_thread(self.cs.ensure_loaded, time)
             await m.delete()
 
     async def cs_update(self, view):
@@ -447,13 +501,7 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
             del self.latest_conflict[view]
             view.finish()
             await mes.edit(view=view)
-            try:
-                await asyncio.to_thread(self.cs.save_excel)
-                _log.info('end saving excel at ' + str(datetime.now()))
-            except Exception as e:
-                await mes.add_reaction('❌')
-                _log.error('failed to save excel at ' + str(datetime.now()))
-                traceback.print_tb(e.__traceback__)
+            # saving is debounced in the background by cs itself
 
     @played.command(aliases=['conflictsheet', 'sheet', 'cs'], with_app_command=False)
     async def concurrencesheet(
@@ -492,29 +540,22 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
         assert len(set(pgs)) == len(pgs) and all(pgs), 'Invalid PG and/or duplicate PG provided.'
 
         if options.prodNumber and options.time == 'daytime':
-            try:
-                row = (
-                    self.cs.get('daytime')
-                    .select(cs.by_name('PROD', 'S') | cs.matches(r'^PG\d$'))
-                    .row(by_predicate=pl.col('PROD') == options.prodNumber)
-                )
-                retro = True
-            except pl.exceptions.RowsError:
-                retro = False
+            row = self.cs.prod_row('daytime', options.prodNumber, named=True)
+            retro = row is not None
 
             if retro:
                 playing_names = []
-                prodSorted = SORT_PROD(options.prodNumber)
-                season = int(row[1])
+                prodKey = row['_PKEY']
+                season = int(row['S'])
 
                 for pg, arg in raw_pgps:
-                    if pg == PG.LuckySeven and prodSorted < SORT_PROD('6131D'):
+                    if pg == PG.LuckySeven and prodKey < prod_key('6131D'):
                         playing_names.append('Lucky Seven')
-                    elif pg == PG.MostExpensive and prodSorted < SORT_PROD('5035K'):
+                    elif pg == PG.MostExpensive and prodKey < prod_key('5035K'):
                         playing_names.append('Most Expensive')
                     elif pg == PG.BargainGame and season < 40:
                         playing_names.append("Barker's Bargain Bar")
-                    elif pg == PG.CheckGame and prodSorted < SORT_PROD('6354D'):
+                    elif pg == PG.CheckGame and prodKey < prod_key('6354D'):
                         playing_names.append('Blank Check')
                     elif pg == PG.FivePriceTags and season < 42:
                         playing_names.append('Five Price Tags')
@@ -522,15 +563,15 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
                         playing_names.append('Pick a Pair')
                     elif pg == PG.TenChances and season < 39:
                         playing_names.append('Ten Chances')
-                    elif pg == PG.NowOrThen and ('nat' in arg.lower() or prodSorted < SORT_PROD('6292D')):
+                    elif pg == PG.NowOrThen and ('nat' in arg.lower() or prodKey < prod_key('6292D')):
                         playing_names.append('Now....and Then')
                     elif pg == PG.DiceGame and 'deluxe' in arg.lower():
                         playing_names.append('Deluxe Dice Game')
                     elif pg == PG.ThreeStrikes and '+' in arg:
                         playing_names.append('3 Strikes +')
-                    elif pg == PG.CardGame and SORT_PROD('4843D') <= prodSorted < SORT_PROD('5383D'):
+                    elif pg == PG.CardGame and prod_key('4843D') <= prodKey < prod_key('5383D'):
                         playing_names.append('New Card Game')
-                    elif pg == PG.HoleInOne and SORT_PROD('6365D') <= prodSorted < SORT_PROD('6671D'):
+                    elif pg == PG.HoleInOne and prod_key('6365D') <= prodKey < prod_key('6671D'):
                         playing_names.append('Hole in One or Two')
                     elif pg == PG.MoneyGame and 'big' in arg.lower():
                         playing_names.append('Big Money Game')
@@ -611,13 +652,6 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
             del self.latest_meta[view]
             view.finish()
             await mes.edit(view=view)
-            try:
-                await asyncio.to_thread(self.cs.save_excel)
-                _log.info('META: end saving excel at ' + str(datetime.now()))
-            except Exception as e:
-                await mes.add_reaction('❌')
-                _log.error('META: failed to save excel at ' + str(datetime.now()))
-                traceback.print_tb(e.__traceback__)
 
     @lineup.command(name='edit', aliases=['e'], with_app_command=False)
     async def editLineup(self, ctx, *, options: EditLineupFlags):
@@ -635,13 +669,11 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
             await ctx.send(f'`Malformed date: {e}`')
             return
 
+        await asyncio.to_thread(self.cs.load, ('daytime', 'primetime'))
         for time in ('daytime', 'primetime'):
-            dfd = self.cs.get(time)
-            try:
+            if (r := self.cs.prod_row(time, options.prodNumber, named=True)) is not None:
                 n_col = 'NOTES' if time == 'daytime' else 'SPECIAL'
-                _, cur_notes, cur_ad, cur_id = dfd.select('PROD', n_col, 'AIRDATE', 'INT. DATE').row(
-                    by_predicate=pl.col('PROD') == options.prodNumber
-                )
+                cur_notes, cur_ad, cur_id = r[n_col], r['AIRDATE'], r['INT. DATE']
 
                 if type(cur_notes) != str:
                     cur_notes = ''
@@ -653,8 +685,6 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
                     + f'\n\t{n_col}: {cur_notes}'
                 )
                 break
-            except pl.exceptions.RowsError:
-                pass
         else:
             await ctx.send('`Production code must exist and be in daytime or primetime.`')
             return
@@ -767,19 +797,22 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
             if options.excludeEducated:
                 flags = [fl - {2**q for q in Q_FLAG} if fl else ALL_FLAGS_BUT_GUESS for fl in flags]
 
-            sub_df = await trim_query(
-                self.cs.concurrence_query(ep, options.time, tuple(pgs), tuple(flags)),
-                options.sortBy,
-                options.since,
-            )
-
-            ttl = sub_df.height
+            # pairs (at most one flagged) come straight from the co-occurrence tensors, unless we need the lineups anyway
+            cc_args = (options.time, tuple(pgs), tuple(flags))
+            if options.showLineup or (ttl := self.cs.concurrence_count(ep, *cc_args)) is None:
+                sub_df = await trim_query(ctx, self.cs.concurrence_query(ep, *cc_args), options.sortBy, options.since)
+                ttl = sub_df.height
+            else:
+                sub_df = None
 
             if bySeasonBool and ttl:
                 season_chunks = [ep.replace(lower=sc[0], upper=sc[-1]) for sc in chunked(ep_list, options.bySeason)]
                 season_chunk_lists = [list(SI.iterate(sc, step=1)) for sc in season_chunks]
-                sub_df_groups = [sub_df.filter(pl.col('S').is_in(scl)) for scl in season_chunk_lists]
-                freq_chunks = [sdg.height for sdg in sub_df_groups]
+                if sub_df is not None:
+                    sub_df_groups = [sub_df.filter(pl.col('S').is_in(scl)) for scl in season_chunk_lists]
+                    freq_chunks = [sdg.height for sdg in sub_df_groups]
+                else:
+                    freq_chunks = [self.cs.concurrence_count(sc, *cc_args) for sc in season_chunks]
 
                 initial_str = '{}, {}{}{}: {} | {}'.format(
                     pgs_str,
@@ -790,16 +823,16 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
                     ttl,
                 )
                 if options.showLineup:
-                    total_str = []
+                    total_str = [initial_str]
                     for fc, sc, scl, sdg in zip(freq_chunks, season_chunks, season_chunk_lists, sub_df_groups):
                         sub_is = '{}, {}: {}'.format(pgs_str, season_portion_str(sc), fc)
+                        total_str.append(LINEUP_SEP)
                         if fc:
                             if options.bySeason == 1:
                                 sdg = sdg.drop('S')
-                            total_str.append(gen_lineup_submes(sdg, sub_is, options.time))
+                            total_str.extend(await gen_lineup_parts(ctx, sdg, sub_is, options.time))
                         else:
                             total_str.append(sub_is)
-                    total_str = initial_str + LINEUP_SEP + LINEUP_SEP.join(total_str)
             else:
                 initial_str = '{}, {}{}: {}'.format(
                     pgs_str,
@@ -808,7 +841,8 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
                     ttl,
                 )
                 if options.showLineup and ttl:
-                    total_str = gen_lineup_submes(
+                    total_str = await gen_lineup_parts(
+                        ctx,
                         (sub_df.drop('S') if ep and options.start == options.end else sub_df),
                         initial_str,
                         options.time,
@@ -1023,7 +1057,8 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
                     )
                     # add extra row of sums at this time, and remove "S" from output,
                     # and collect finally as LazyFrame doesn't support final steps
-                    h = (
+                    h = await self.queries.collect(
+                        ctx,
                         pl.concat(
                             [
                                 h,
@@ -1034,9 +1069,7 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
                                     ]
                                 ),
                             ]
-                        )
-                        .rename({'S': ''})
-                        .collect()
+                        ).rename({'S': ''}),
                     )
                     # drop uncertain cols if 0 (iterating over Series columns)
                     h = h.drop([s.name for s in h if s.name in ('PG^', 'PG?') and not s.sum()])
@@ -1047,15 +1080,15 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
 
                     fs.append(f'{qPGName}{f_str}, {epText} ({options.bySeason}):\n\n{ssss}')
                 else:
-                    h = (
+                    h = await self.queries.collect(
+                        ctx,
                         sub_slots_df.filter(
                             pl.col('PG').is_in([str(pg) for pg in pgQ]) if isPGGroup else pl.col('PG') == str(pgQ)
                         )
                         .drop('PG')
                         .group_by('flag')
-                        .agg(cs.matches(r'^PG\d$').sum())
+                        .agg(cs.matches(r'^PG\d$').sum()),
                         # .with_columns(pl.concat_list(pl.exclude('flag')).list.sum().alias('ALL'))
-                        .collect()
                     )
 
                     ssd_pg_certain = h.filter(pl.col('flag') < SlotCertainty.SLOT).sum().fill_null(0).row(0)[1:]
@@ -1172,7 +1205,9 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
         if filt_exprs:
             sub_slots_df = sub_slots_df.filter(filt_exprs)
 
-        ddf = sub_slots_df.group_by('PG').agg(pl.exclude('flag', 'S').sum()).select(cs.matches(r'^PG\d?$')).collect()
+        ddf = await self.queries.collect(
+            ctx, sub_slots_df.group_by('PG').agg(pl.exclude('flag', 'S').sum()).select(cs.matches(r'^PG\d?$'))
+        )
 
         if ddf.height:
             q = ddf.lazy()
@@ -1227,6 +1262,8 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
 
         The dataset used is determined by the time, start and end parameters. For more on these, see the FAQ.
 
+        If bySeason is non-zero, partition the output by the given number of seasons (provided the given time has seasons).
+
         For daytime, playings with the educated guess flag (?) can be optionally excluded.
 
         PGs are all mapped to at least one single-word key. See the FAQ for a complete listing.
@@ -1245,13 +1282,21 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
             return
 
         try:
-            ep, epText, _ = await parse_time_options(ctx, options, *pgs)
+            ep, epText, isDate = await parse_time_options(ctx, options, *pgs)
         except ValueError:
             return  # error message sending taken care of in parse_time_options (could have factored in coding better)
         except AssertionError as e:
             await ctx.send(f'`Error parsing time options: {e.message}`')
             return
 
+        bySeasonBool = (
+            not isDate
+            and ep
+            and options.bySeason > 0
+            and not ep.empty
+            and options.bySeason < len(ep_list := list(SI.iterate(ep, step=1)))
+        )
+
         async with ctx.typing():
             flags = [None] * len(pgs)
             fs_str = [None] * len(pgs)
@@ -1276,147 +1321,149 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
             if options.excludeEducated:
                 flags = [fl - {2**q for q in Q_FLAG} if fl else ALL_FLAGS_BUT_GUESS for fl in flags]
 
-            sub_df = self.cs.concurrence_query(ep, options.time, tuple(pgs), tuple(flags)).collect()
-            total_playings = sub_df.height
+            cc_args = (options.time, tuple(pgs), tuple(flags))
+            table = await self.queries.run(ctx, self.cs.partner_table, ep, *cc_args, options.bySeason if bySeasonBool else 0)
 
-            # all-Dinko check
-            try:
-                check = sub_df.row(by_predicate=pl.col('PROD') == '6435K')
-                all_dinko = True
-            except pl.exceptions.RowsError:
-                all_dinko = False
-
-            sub_df = (
-                sub_df.select(
-                    pl.concat_list(r'^PG\d_p$')
-                    .alias('PG')
-                    .list.explode()
-                    .drop_nulls()
-                    .value_counts(sort=True, parallel=True)
-                    .struct.rename_fields(('PG', 'count'))
-                )
-                .unnest('PG')
-                .filter(~pl.col('PG').is_in([str(pg) for pg in pgs]))
+            # all-Dinko show handling. will be true only when exactly only Dinko in PGs and S42 included.
+            dinko = (
+                await self.queries.collect(ctx, self.cs.concurrence_query(ep, *cc_args).filter(pl.col('PROD') == '6435K'))
+                if pgs == [PG.Plinko] and (not (fs := flags[0]) or (fs & ALL_PLINKO_FLAGS))
+                else None
             )
 
-            if options.pgGroupCompare:
-                sub_df = sub_df.filter(pl.col('PG').is_in([str(pg2) for pg2 in options.pgGroupCompare if pg2.activeIn(ep)]))
+            if bySeasonBool:
+                season_chunks = [ep.replace(lower=sc[0], upper=sc[-1]) for sc in chunked(ep_list, options.bySeason)]
+                groups = [(sc, season_portion_str(sc), table.filter(S=sc.lower).drop('S')) for sc in season_chunks]
+            else:
+                groups = [(ep, epText, table)]
 
-            if N1 > total_playings:
-                N1 = total_playings
-            if N2 and N2 > total_playings:
-                N2 = total_playings
-            if N1 == N2:
-                N2 = None
+            pgGroupStr = (
+                ' (only {} games)'.format(PG.partition_table.inverse[frozenset(options.pgGroupCompare)])
+                if options.pgGroupCompare
+                else ''
+            )
+            cr_str = 'playing' if len(pgs) == 1 else 'concurrence'
 
-            # all-Dinko show handling. will be true only when exactly only Dinko in PGs and S42 included.
-            if all_dinko and (not (fs := flags[0]) or (fs & ALL_PLINKO_FLAGS)):
-                val = 5  # 6 - len(pgs)
+            texts = []
+            for g_ep, g_text, sub_df in groups:
+                total_playings = sub_df.filter(pl.col('PG') == str(pgs[0])).get_column('count').sum()
+                sub_df = sub_df.filter(~pl.col('PG').is_in([str(pg) for pg in pgs]))
 
-                sub_df = sub_df.vstack(
-                    pl.DataFrame(
-                        [
-                            pl.Series('PG', ['Plinko']),
-                            pl.Series('count', [val], dtype=pl.UInt32),
-                        ]
+                if options.pgGroupCompare:
+                    sub_df = sub_df.filter(
+                        pl.col('PG').is_in([str(pg2) for pg2 in options.pgGroupCompare if pg2.activeIn(g_ep)])
                     )
-                    # unfortunately forced to resort here
-                ).sort('count', True)
 
-                if N1 == val and not N2:
-                    pass
-                elif not N2 and N1 != val:
-                    if N1 > val:
-                        N2 = N1
-                        N1 = val
-                    else:
-                        N2 = val
-                elif N1 > val:
-                    N1 = val
-                elif N2 < val:
-                    N2 = val
-
-            if not total_playings:
-                pgGroupStr = (
-                    ' with {} games'.format(PG.partition_table.inverse[frozenset(options.pgGroupCompare)])
-                    if options.pgGroupCompare
-                    else ''
-                )
-                if len(pgs) == 1:
-                    await ctx.send(
-                        '`{} {} played in {} ({}){}.`'.format(
-                            pgs_str,
-                            ('has not been' if CURRENT_SEASON in ep and not pgs[0].retired else 'was not'),
-                            (options.time if options.time != 'daytime' else 'this time period'),
-                            epText,
-                            pgGroupStr,
+                n1 = min(N1, total_playings)
+                n2 = N2 and min(N2, total_playings)
+                if n1 == n2:
+                    n2 = None
+
+                if dinko is not None and dinko.height and (not bySeasonBool or dinko.get_column('S')[0] in g_ep):
+                    val = 5  # 6 - len(pgs)
+
+                    sub_df = sub_df.vstack(
+                        pl.DataFrame(
+                            [
+                                pl.Series('PG', ['Plinko']),
+                                pl.Series('count', [val], dtype=pl.UInt32),
+                            ]
                         )
+                        # unfortunately forced to resort here
+                    ).sort('count', descending=True)
+
+                    if n1 == val and not n2:
+                        pass
+                    elif not n2 and n1 != val:
+                        if n1 > val:
+                            n2 = n1
+                            n1 = val
+                        else:
+                            n2 = val
+                    elif n1 > val:
+                        n1 = val
+                    elif n2 < val:
+                        n2 = val
+
+                if not total_playings:
+                    compareStr = (
+                        ' with {} games'.format(PG.partition_table.inverse[frozenset(options.pgGroupCompare)])
+                        if options.pgGroupCompare
+                        else ''
                     )
-                else:
-                    await ctx.send(
-                        '`{} have no concurrences in {} ({}){}.`'.format(
-                            pgs_str,
-                            (options.time if options.time != 'daytime' else 'this time period'),
-                            epText,
-                            pgGroupStr,
+                    if len(pgs) == 1:
+                        texts.append(
+                            '{} {} played in {} ({}){}.'.format(
+                                pgs_str,
+                                ('has not been' if CURRENT_SEASON in g_ep and not pgs[0].retired else 'was not'),
+                                (options.time if options.time != 'daytime' else 'this time period'),
+                                g_text,
+                                compareStr,
+                            )
                         )
-                    )
-                return
-
-            if not N1:
-                result0 = filter(
-                    lambda pg2: (pg2 != PG._UNKNOWN if options.time != 'daytime' else pg2.activeIn(ep)),
-                    (options.pgGroupCompare or set(list(PG))) - {PG.lookup(s) for s in sub_df.to_series()},
-                )
+                    else:
+                        texts.append(
+                            '{} have no concurrences in {} ({}){}.'.format(
+                                pgs_str,
+                                (options.time if options.time != 'daytime' else 'this time period'),
+                                g_text,
+                                compareStr,
+                            )
+                        )
+                    continue
 
-            pgGroupStr = (
-                ' (only {} games)'.format(PG.partition_table.inverse[frozenset(options.pgGroupCompare)])
-                if options.pgGroupCompare
-                else ''
-            )
-            cr_str = 'playing' if len(pgs) == 1 else 'concurrence'
+                if not n1:
+                    result0 = filter(
+                        lambda pg2: (pg2 != PG._UNKNOWN if options.time != 'daytime' else pg2.activeIn(g_ep)),
+                        (options.pgGroupCompare or set(list(PG))) - {PG.lookup(s) for s in sub_df.get_column('PG')},
+                    )
 
-            if N2:
-                sdf = sub_df.filter(pl.col('count').is_between(N1, N2, closed='both'))
-                # as of between polars 1.5 and 1.9, group names are now tuples of the group_by key(s)
-                # also causing the default iteration order to change, so now it's made explicitly by reverse count
-                r_text = [
-                    f'{N}: ' + ', '.join(sorted(sdfg.to_series()))
-                    for (N,), sdfg in sorted(sdf.group_by('count'), key=lambda g: g[0], reverse=True)
-                ]
+                if n2:
+                    sdf = sub_df.filter(pl.col('count').is_between(n1, n2, closed='both'))
+                    # as of between polars 1.5 and 1.9, group names are now tuples of the group_by key(s)
+                    # also causing the default iteration order to change, so now it's made explicitly by reverse count
+                    r_text = [
+                        f'{N}: ' + ', '.join(sorted(sdfg.get_column('PG')))
+                        for (N,), sdfg in sorted(sdf.group_by('count'), key=lambda g: g[0], reverse=True)
+                    ]
 
-                if not N1 and (zero_str := ', '.join([str(pg2) for pg2 in sorted(result0, key=NAME_ATTRGET)])):
-                    r_text.append(f'0: {zero_str}')
+                    if not n1 and (zero_str := ', '.join([str(pg2) for pg2 in sorted(result0, key=NAME_ATTRGET)])):
+                        r_text.append(f'0: {zero_str}')
 
-                initial_str = '{}, {}, {}{}, out of {} {}{}:'.format(
-                    pgs_str,
-                    epText,
-                    f'{N1} <= N <= {N2}' + pgGroupStr,
-                    ', no ? flag' if options.excludeEducated else '',
-                    total_playings,
-                    cr_str,
-                    's' if total_playings != 1 else '',
-                )
-                total_str = initial_str + '\n\n' + ('\n'.join(r_text) if r_text else 'None')
-
-                await send_long_mes(ctx, total_str)
-            else:
-                if N1:
-                    r_text = (', '.join(sub_df.filter(count=N1).to_series())) or 'None'
-                else:
-                    r_text = (', '.join([str(pg2) for pg2 in sorted(result0, key=NAME_ATTRGET)])) or 'None'
-                await ctx.send(
-                    '`{}, {}, {}{}, out of {} {}{}: {}`'.format(
+                    initial_str = '{}, {}, {}{}, out of {} {}{}:'.format(
                         pgs_str,
-                        epText,
-                        f'N = {N1}' + pgGroupStr,
+                        g_text,
+                        f'{n1} <= N <= {n2}' + pgGroupStr,
                         ', no ? flag' if options.excludeEducated else '',
                         total_playings,
                         cr_str,
                         's' if total_playings != 1 else '',
-                        r_text,
                     )
-                )
+                    texts.append(initial_str + '\n\n' + ('\n'.join(r_text) if r_text else 'None'))
+                else:
+                    if n1:
+                        r_text = (', '.join(sub_df.filter(count=n1).get_column('PG'))) or 'None'
+                    else:
+                        r_text = (', '.join([str(pg2) for pg2 in sorted(result0, key=NAME_ATTRGET)])) or 'None'
+                    texts.append(
+                        '{}, {}, {}{}, out of {} {}{}: {}'.format(
+                            pgs_str,
+                            g_text,
+                            f'N = {n1}' + pgGroupStr,
+                            ', no ? flag' if options.excludeEducated else '',
+                            total_playings,
+                            cr_str,
+                            's' if total_playings != 1 else '',
+                            r_text,
+                        )
+                    )
+
+        if bySeasonBool:
+            await send_long_mes(ctx, LINEUP_SEP.join(texts))
+        elif '\n' in texts[0]:
+            await send_long_mes(ctx, texts[0])
+        else:
+            await ctx.send(f'`{texts[0]}`')
 
     @lineup.command(name='prod', aliases=['p', 'production'])
     async def lineupProd(self, ctx, production_numbers: commands.Greedy[prodStr]):
@@ -1428,11 +1475,13 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
             raise commands.BadArgument('`Must provide at least one production number.`')
 
         sent_any = False
+        # looks in every era, read any that aren't yet in off the event loop
+        await asyncio.to_thread(self.cs.load)
 
         for time in ('daytime', 'primetime', 'syndicated', 'unaired'):
-            sub_df = await trim_query(self.cs.get(time).lazy().filter(pl.col('PROD').is_in(production_numbers)))
+            sub_df = await trim_query(ctx, self.cs.prod_rows(time, production_numbers).lazy())
             if sub_df.height:
-                await send_long_mes(ctx, gen_lineup_submes(sub_df, '', time))
+                await send_long_mes(ctx, await gen_lineup_parts(ctx, sub_df, '', time))
                 sent_any = True
 
         if not sent_any:
@@ -1453,15 +1502,14 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
         """
         dates = re.split(r'\s+', dates)
         try:
-            dts = [(datetime.strptime(d, dateFormat) - datetime(1970, 1, 1)).days for d in dates]
+            dts = [datetime.strptime(d, dateFormat) for d in dates]
         except ValueError as e:
             await ctx.send(f'`Malformed date: {e}`')
             return
 
-        df = self.cs.get(time)
-        sub_df = await trim_query(df.lazy().filter(pl.col('AIRDATE').dt.epoch('d').is_in(dts)))
+        sub_df = await trim_query(ctx, self.cs.airdate_rows(time, dts).lazy())
         if sub_df.height:
-            await send_long_mes(ctx, gen_lineup_submes(sub_df, '', time))
+            await send_long_mes(ctx, await gen_lineup_parts(ctx, sub_df, '', time))
         else:
             await ctx.send(f'`No lineups in {time} for any of these dates.`')
 
@@ -1478,27 +1526,17 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
         For valid production code patterns, see the FAQ.
         """
         sub_df = self.cs.get(time)
-        n_idx = sub_df.columns.index('PG_n')
 
-        try:
-            start_idx = sub_df.row(by_predicate=pl.col('PROD') == start)[n_idx]
-        except pl.exceptions.RowsError as e:
-            await ctx.send(f'`Invalid production code for {time}: {start}`')
-            return
-        try:
-            end_idx = sub_df.row(by_predicate=pl.col('PROD') == end)[n_idx]
-        except pl.exceptions.RowsError as e:
-            await ctx.send(f'`Invalid production code for {time}: {end}`')
+        span = self.cs.prod_span(time, start, end)
+        if span is None:
+            bad = ', '.join(p for p in (start, end) if not self.cs.prod_span_end(time, p))
+            await ctx.send(f'`Invalid production code for {time}: {bad}`')
             return
 
-        if start_idx < end_idx:
+        if span[1]:
             await send_long_mes(
                 ctx,
-                gen_lineup_submes(
-                    await trim_query(sub_df.lazy().slice(start_idx - 1, end_idx - start_idx + 1)),
-                    '',
-                    time,
-                ),
+                await gen_lineup_parts(ctx, await trim_query(ctx, sub_df.lazy().slice(*span)), '', time),
             )
         else:
             await ctx.send(
@@ -1529,12 +1567,13 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
             await ctx.send(f'`Malformed input: {e}`')
             return
 
-        dts = pl.date_range(startDate, endDate, step, eager=True)
-
-        df = self.cs.get(time)
-        sub_df = await trim_query(df.lazy().filter(pl.col('AIRDATE').is_in(dts)))
+        if step == '1d':
+            sub_df = self.cs.airdate_rows(time, start=startDate, end=endDate)
+        else:
+            sub_df = self.cs.airdate_rows(time, pl.date_range(startDate, endDate, step, eager=True))
+        sub_df = await trim_query(ctx, sub_df.lazy())
         if sub_df.height:
-            await send_long_mes(ctx, gen_lineup_submes(sub_df, '', time))
+            await send_long_mes(ctx, await gen_lineup_parts(ctx, sub_df, '', time))
         else:
             await ctx.send(f'`No lineups in {time} for any of these dates.`')
 
@@ -1553,7 +1592,7 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
             await ctx.send(f'`Error parsing time options: {e.message}`')
             return
 
-        df = self.cs.endpoint_sub(ep, options.time).collect()
+        df = await self.queries.collect(ctx, self.cs.endpoint_sub(ep, options.time))
 
         if options.sort:
             comp = operator.lt
@@ -1563,8 +1602,8 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
             extra_str = ''
 
         if comp(N, df.height):
-            sub_df = await trim_query(df.sample(n=N, with_replacement=False, shuffle=not options.sort).lazy())
-            await send_long_mes(ctx, gen_lineup_submes(sub_df, '', options.time))
+            sub_df = await trim_query(ctx, df.sample(n=N, with_replacement=False, shuffle=not options.sort).lazy())
+            await send_long_mes(ctx, await gen_lineup_parts(ctx, sub_df, '', options.time))
         else:
             await ctx.send(f'`No point to picking{extra_str} {N} shows out of a sample size of {df.height}.`')
 
@@ -1587,6 +1626,7 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
 
         overallCond = []
         condition_strs = []
+        condition_keys = []
         warning_strs = SortedSet()
         slot_queried = False
         warned_slot = False
@@ -1614,11 +1654,13 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
                         f = f.cast(str)
                     f = f.str.contains(f'(?i){regex}')
                     cd = f'{col} matches "{regex}" (case-insensitive)'
+                    ck = (col, regex)
                 case ['SEASON' | 'S' as col, *e]:
                     if options.time == 'primetime':
                         raise ValueError('Season condition is invalid for primetime.')
                     f, cd, _ = build_int_expression(pl.col('S'), e)
                     cd = f'SEASON is {cd}'
+                    ck = ('S', *e)
                 case [
                     'DATE' | 'D' | 'AIR' | 'ID' | 'INT' | 'INTENT' | 'INT. DATE' | 'INTENDED' | 'AIRDATE' as col,
                     'YEAR' | 'Y' | 'MONTH' | 'M' | 'DAY' | 'D' | 'DOW' | 'WKDAY' | 'WEEKDAY' as dt_q,
@@ -1628,6 +1670,7 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
                     if options.time == 'syndicated' or (options.time == 'unaired' and col == 'AIRDATE'):
                         raise ValueError(f'{col} condition is invalid for {options.time}.')
                     f, cd = build_dt_q_expression(col, dt_q, e)
+                    ck = (col, dt_q, *e)
                 case ['DATE' | 'D' | 'AIR' | 'ID' | 'INTENDED' | 'AIRDATE' as col, *e]:
                     col = _col_name_remapping.get(col, col)
                     if options.time == 'syndicated' or (options.time == 'unaired' and col == 'AIRDATE'):
@@ -1635,6 +1678,7 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
                     e = transform_str_to_dts(e, options.dateFormat)
                     f, cd = build_date_expression(pl.col(col), e, options.dateFormat)
                     cd = f'{col} is {cd}'
+                    ck = (col, options.dateFormat, *e)
                 case [pgCondWords]:
                     used_pg_condition = True
                     pgq = None
@@ -1692,7 +1736,9 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
                         )
                         warned_game = True
 
-                    f = build_lineup_expr(pgq, slots, flags, freqs)
+                    # only looked up if the search isn't already cached
+                    f = partial(self.cs.lineup_mask, options.time, pgq, slots, flags, freqs)
+                    ck = ('PG', pgq, slots, flags, freqs)
 
                     slots_l = sorted(slots)
                     slots_str = 'played ' + (
@@ -1763,6 +1809,7 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
 
             overallCond.append(f)
             condition_strs.append(cd)
+            condition_keys.append(ck)
 
         if len(overallCond) > 26:
             raise ValueError(
@@ -1773,21 +1820,36 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
                 f'`Logical expression mismatch. Expecting {len(overallCond)} variables, got {sym_free} instead in "{options.logicExpr}"`'
             )
 
-        async with ctx.typing():
-            if options.logicExpr == 'all':
-                total_expr = pl.all_horizontal(overallCond)
-            elif options.logicExpr == 'any':
-                total_expr = pl.any_horizontal(overallCond)
-            else:
-                l = locals()
-                l |= {letter: fe for fe, letter in zip(overallCond, string.ascii_uppercase)}
-                total_expr = eval(re.sub('([A-Z])', r'(\1)', options.logicExpr))
+        # the parsed conditions (so excludeUncertain is already folded into the PG ones) are what a result is cached by.
+        # all/any don't care about order or repeats, a custom expression's letters do. since only adds a column.
+        search_key = (
+            frozenset(condition_keys) if options.logicExpr in ('all', 'any') else tuple(condition_keys),
+            options.logicExpr,
+            options.sortBy,
+        )
+        by_date = options.sortBy == 'date'
+        reads_meta = by_date or any(ck[0] in ('NOTES', 'SPECIAL', 'AIRDATE', 'INT. DATE') for ck in condition_keys)
+
+        plan = compile_logic(options.logicExpr, condition_aliases(condition_keys))
+
+        def search_rows(df):
+            # PG conditions come back as masks off the lineup index, the rest are evaluated here, each distinct one once.
+            # everything is combined as boolean Series, which keeps the same null logic as the old expressions.
+            conds = {
+                i: df.select(f).to_series() if isinstance(f, pl.Expr) else f()
+                for i, f in enumerate(overallCond)
+                if i in plan.leaves
+            }
+            total = plan(conds)
+
+            rows = np.flatnonzero(total.fill_null(False).to_numpy())
+            if by_date and 'AIRDATE' in df.columns:
+                rows = rows[df.get_column('AIRDATE').gather(rows).arg_sort().to_numpy()]
+            return rows
 
-            sub_df = await trim_query(
-                self.cs.endpoint_sub(None, options.time).filter(total_expr),
-                options.sortBy,
-                options.since,
-            )
+        async with ctx.typing():
+            sub_df = await self.queries.run(ctx, self.cs.search_lineups, options.time, search_key, search_rows, reads_meta)
+            sub_df = await trim_query(ctx, sub_df.lazy(), options.sortBy, options.since)
 
             all_full_hour = not (
                 options.time == 'syndicated'
@@ -1812,16 +1874,28 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
                 final_cond_str,
             )
 
-            main_mes = gen_lineup_submes(sub_df, initial_str, options.time)
+            # the flags as they would show anywhere in the message, without rendering it
+            flagged = {
+                f: found or f in initial_str
+                for f, found in sub_df.select(
+                    pl.any_horizontal(cs.string().str.contains(f, literal=True)).any().alias(f) for f in ('(^)', '(?)')
+                )
+                .row(0, named=True)
+                .items()
+            }
 
-            if slot_queried and not warned_slot and '(^)' in main_mes:
+            if slot_queried and not warned_slot and flagged['(^)']:
                 warning_strs.add('DISCLAIMER: Slotting of uncertainly slotted playings factored into results.')
-            if not warned_game and '(?)' in main_mes:
+            if not warned_game and flagged['(?)']:
                 warning_strs.add(
                     'DISCLAIMER: Playings marked with the ? flag belong to a lineup that is, at worst, close to the given production number.'
                 )
 
-        await send_long_mes(ctx, '\n'.join(warning_strs) + ('\n\n' if warning_strs else '') + main_mes)
+        head = '\n'.join(warning_strs) + ('\n\n' if warning_strs else '') + initial_str
+        if sub_df.height:
+            await send_long_table(ctx, head, lineup_display_query(sub_df, options.time))
+        else:
+            await send_long_mes(ctx, head)
 
     @played.command(name='last', aliases=['l'], with_app_command=False)
     async def lastPlayed(
@@ -1846,7 +1920,8 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
             unfound_pgs = set()
             for q in pgs:
                 if type(q) is str:
-                    r = self.cs.get('daytime').row(by_predicate=pl.col('PROD') == q, named=True)
+                    if (r := self.cs.prod_row('daytime', q, named=True)) is None:
+                        raise pl.exceptions.RowsError(q)
                     unfound_pgs |= {PG.lookup(r[f'PG{i}_p']) for i in range(1, 7 if r['PG4_p'] else 4)}
                 elif type(q) is PG:
                     unfound_pgs.add(q)
@@ -1854,7 +1929,9 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
                     unfound_pgs |= q
 
             if options.asOf:
-                cutoff = self.cs.get('daytime').select('PROD', 'PG_n').row(by_predicate=pl.col('PROD') == options.asOf)[1]
+                if (r := self.cs.prod_row('daytime', options.asOf, named=True)) is None:
+                    raise pl.exceptions.RowsError(options.asOf)
+                cutoff = r['PG_n']
         except pl.exceptions.RowsError:
             await ctx.send(
                 '(One of) the daytime codes given to `pgs` or `asOf`, despite being properly formatted, does not exist. Some codes do get skipped.',
@@ -1868,8 +1945,6 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
             await ctx.send('`No PGs given. (If doing retired games only, set activeOnly to False.)`')
             return
 
-        seasons = SI.closed(1, CURRENT_SEASON) & reduce(operator.or_, [pg.activeSeasons for pg in unfound_pgs])
-
         if options.pgFlag:
             extra_str = (
                 PLAYING_FLAGS[len(PLAYING_FLAGS) - 1 - PLAYING_FLAGS_SINGLE.index(options.pgFlag)]
@@ -1881,28 +1956,22 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
         else:
             fs = ANY_FLAG
 
-        unfound_pgs = {str(pg) for pg in unfound_pgs}
-
         async with ctx.typing():
-            results = []
-            q = self.cs.endpoint_sub(seasons, 'daytime')
-
-            for pg in unfound_pgs:
-                e = [build_lineup_expr(frozenset({pg}), ANY_SLOT, fs, ANY_FREQ)]
-                if options.asOf:
-                    e.append(pl.col('PG_n') <= cutoff)
-
-                qq = q.filter(e).select('PROD', 'AIRDATE')
-                if options.sortBy == 'date':
-                    qq = qq.sort('AIRDATE')
-                qq = qq.tail(nth).collect()
-                if qq.height:
-                    prod, airdate = qq.row(0)
-                    results.append((pg, prod, airdate))
+            last = await self.queries.run(
+                ctx,
+                self.cs.last_played_rows,
+                'daytime',
+                unfound_pgs,
+                nth,
+                fs,
+                cutoff - 1 if options.asOf else None,
+                options.sortBy,
+            )
+            results = [(str(pg), prod, airdate) for pg, (prod, airdate) in last.items()]
 
             if results:
                 results.sort(
-                    key=lambda t: SORT_PROD(t[1]) if options.sortBy == 'prod' else t[2],
+                    key=lambda t: prod_key(t[1]) if options.sortBy == 'prod' else t[2],
                     reverse=True,
                 )
                 extra = f' ({extra_str})' if options.pgFlag is not None else ''
@@ -1943,15 +2012,9 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
             qs = []
             for q in pgs:
                 if type(q) is str:
-                    qs.extend(
-                        [
-                            PG.lookup(p)
-                            for p in self.cs.get('daytime')
-                            .select(pl.col('PROD') | cs.matches(r'^PG\d_p$'))
-                            .row(by_predicate=pl.col('PROD') == q)[1:]
-                            if p
-                        ]
-                    )
+                    if (r := self.cs.prod_row('daytime', q, named=True)) is None:
+                        raise pl.exceptions.RowsError(q)
+                    qs.extend([PG.lookup(r[f'PG{i}_p']) for i in range(1, 7) if r[f'PG{i}_p']])
                 elif type(q) is PG:
                     qs.append(q)
                 else:
@@ -2033,7 +2096,8 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
                     pl.when(pl.col('DIF') >= 0).then(('+' + pl.col('DIF').cast(str)).alias('DIF')).otherwise(pl.col('DIF'))
                 )
 
-                await send_long_mes(ctx, ppp(result_df.collect().rename({'PG': ''})), newline_limit=14)
+                result_df = await self.queries.collect(ctx, result_df.rename({'PG': ''}))
+                await send_long_mes(ctx, ppp(result_df), newline_limit=14)
 
     @lineup.command(aliases=['c'])
     async def count(
@@ -2102,6 +2166,19 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
 
         await ctx.send(('>>> ' if options.N > 1 else '') + '\n'.join([f'`{ls}`' for ls in lineup_strs]))
 
+    @lineup.command(hidden=True, aliases=['calib'])
+    @commands.is_owner()
+    async def calibrate(self, ctx, N: commands.Range[int, 100, 100000] = 10000, seasons: commands.Range[int, 1, 10] = 3):
+        """Generates N "smart" lineups and compares them to the real full-hour lineups of the last few seasons."""
+        async with ctx.typing():
+            ep = SI.closed(CURRENT_SEASON - seasons + 1, CURRENT_SEASON)
+            group_df, pg_df, pair_df = await asyncio.to_thread(self.cs.calibration_report, N, ep)
+            await send_long_mes(
+                ctx,
+                f'{N} generated vs. {season_portion_str(ep)} (% of lineups):\n\n'
+                + '\n\n'.join(ppp(df) for df in (group_df, pg_df, pair_df)),
+            )
+
     @lineup.command(aliases=['a', 'notes', 'n'])
     async def addendum(self, ctx):
         """Prints a static message with some extra explanation on a few oddities in the lineup database."""
@@ -2124,26 +2201,77 @@ class LineupCog(commands.Cog, name='TPIRLineups'):
         else:
             await ctx.send('>>> ' + '\n'.join(f'`{k}` {v}' for k, v in FLAG_INFO.items()))
 
+    @lineup.command(aliases=['b'], with_app_command=False)
+    async def batch(self, ctx, *, queries: str):
+        """Runs several lineup search, played concurrence and/or played slots commands at once, one per line (written just as they would be on their own, the prefix is optional), and sends back one combined report.
+
+        The queries are planned together, so any work they have in common is only done once. At most 10 at a time."""
+        lines = [l.strip().removeprefix(ctx.prefix) for l in queries.splitlines() if l.strip()]
+        if len(lines) > BATCH_MAX:
+            raise commands.BadArgument(f'At most {BATCH_MAX} queries in a batch, got {len(lines)}.')
+
+        # every era up front, so no query stops to say it's loading
+        await asyncio.to_thread(self.cs.load)
+
+        batch = QueryBatch(self.queries, ctx)
+        outputs, subs = [], []
+        for line in lines:
+            outputs.append(out := [])
+            message = copy(ctx.message)
+            message.content = ctx.prefix + line
+            sub = await self.bot.get_context(message)
+            if sub.command and sub.command.qualified_name in BATCHABLE:
+                sub.query_batch, sub.batch_parts, sub.send = batch, out, partial(batch_send, out)
+                subs.append(sub)
+            else:
+                out.append(['Not a lineup search, played concurrence or played slots command.'])
+
+        async with ctx.typing():
+            # all started together, so each round of querying has every one of them in it
+            await asyncio.gather(*[batch.track(self.bot.invoke(sub)) for sub in subs])
+
+        parts = []
+        for line, out in zip(lines, outputs):
+            parts.extend([LINEUP_SEP] if parts else [])
+            parts.append(f'> {line}\n\n')
+            for i, o in enumerate(out or [['(no output)']]):
+                parts.extend(['\n\n', *o] if i else o)
+        await send_long_mes(ctx, parts)
+
     @lineup.command()
     async def excel(self, ctx):
         """Returns a neatly printed Excel file containing wayo.py's whole lineup database."""
-        with self.cs.write_excel() as b:
+        # every era, and a big workbook to write
+        with await asyncio.to_thread(self.cs.write_excel) as b:
             b.seek(0)
             await ctx.send(file=discord.File(b, filename='lineups.xlsx'))
 
     @lineup.command(hidden=True)
     @commands.is_owner()
-    async def reload(self, ctx):
+    async def reload(self, ctx, fromExcel: bool = False):
+        # fromExcel: re-read the workbook (e.g. after hand edits to it) and overwrite the binary store with it
         await ctx.message.add_reaction('🚧')
         _log.info('start loading cs at ' + str(datetime.now()))
         async with self.latest_lock:
-            await asyncio.to_thread(self.cs.initialize)
+            await asyncio.to_thread(self.cs.initialize, fromExcel)
+            await asyncio.to_thread(self.cs.load)
         _log.info('end loading cs at ' + str(datetime.now()))
         await ctx.message.remove_reaction('🚧', ctx.bot.user)
         await ctx.message.add_reaction('✅')
 
+    @lineup.command(hidden=True, aliases=['cache'])
+    @commands.is_owner()
+    async def cachestats(self, ctx):
+        await send_long_mes(ctx, ppp(self.cs.cache_stats()))
+
     async def cog_command_error(self, ctx, e):
-        if ctx.command.name == 'search':
+        if isinstance(e, commands.MaxConcurrencyReached):
+            await ctx.send(
+                '`Too many lineup queries already running '
+                + ('for you' if e.per is commands.BucketType.user else 'in this channel')
+                + ', try again in a moment.`'
+            )
+        elif ctx.command.name == 'search':
             if isinstance(
                 e,
                 (
@@ -1,13 +1,16 @@
 import asyncio
+import hashlib
 import logging
 import os
 import re
 from datetime import datetime, date
 from functools import partial, reduce
 from operator import attrgetter, or_
+from string import ascii_uppercase
 from typing import *
 
 import aiofile
+import numpy as np
 import polars as pl
 import polars.selectors as cs
 import portion as P
@@ -24,6 +27,14 @@ Range = Union[range, Iterable[int]]
 _log = logging.getLogger('wayo_log')
 
 CURRENT_SEASON = 43
+# dense per-puzzle letter counts, one UInt8 column per letter, computed once per page at load
+LETTER_COLS = [f'_{c}' for c in ascii_uppercase]
+WORD_REGEX = r"\b[A-Z-'\.]+\b"
+# bump whenever the read_csv options in _load_season change, so stale cached pages are never loaded.
+_PAGE_CACHE_VERSION = 1
+_PAGE_CACHE_DIR = os.path.expanduser('~/.cache/wayo-py/compendium')
+_LOCAL_DIR = os.path.expanduser('~/Dropbox/heroku/wayo-py/compendium')
+_DROPBOX_DIR = '/heroku/wayo-py/compendium'
 COMPENDIUM_NOTES = """- On November 2 1992 (S10, #1796), R1 (VANNA'S PREGNANT) was heavily edited due to Vanna's miscarriage. Despite this editing we know what the puzzle was, so it does remain in the compendium.
 - On November 20 1998 (S16, #2980) and November 10 2003 (S21, #3946), there were clip shows celebrating the 3000th and 4000th show milestones. There are no actual puzzles that day and those dates are omitted entirely.
 - On November 16 2005 (S23, #4338), R1 was edited out of the final cut to Hurricane Katrina. This row is omitted from this version of the compendium entirely, as unlike the PREGNANT puzzle we have no idea what the puzzle was.
@@ -31,13 +42,219 @@ COMPENDIUM_NOTES = """- On November 2 1992 (S10, #1796), R1 (VANNA'S PREGNANT) w
 """
 
 
+# the syndicated seasons each choices page covers, by the digit of its name
+_CHOICES_SEASONS = {'4': range(35, 41), '5': range(41, 51)}
+
+
+def _row_ids(part: int = 0) -> pl.Expr:
+    # _ID: what the word & trigram indexes filter on, unique across a frame and increasing down it. each syndicated
+    # season gets its own block of ids, so one season is rebuilt without renumbering the rest
+    return (pl.int_range(pl.len(), dtype=pl.UInt32) + (part << 16)).alias('_ID')
+
+
+class _WordShard:
+    # one partition's words, sorted so each distinct word's postings are one contiguous run
+    def __init__(self, lf: pl.LazyFrame):
+        words = (
+            lf.select('_ID', pl.col('PUZZLE').str.extract_all(WORD_REGEX).alias('WORD'))
+            .collect()
+            .explode('WORD', empty_as_null=False, keep_nulls=False)
+            # position from the front (0, 1, ...) and from the back (-1 is the last word), like list.get takes
+            .with_columns(pl.int_range(pl.len(), dtype=pl.Int32).over('_ID').alias('POS'))
+            .with_columns((pl.col('POS') - pl.len().over('_ID').cast(pl.Int32)).alias('RPOS'))
+            .sort('WORD', maintain_order=True)
+        )
+        self._ids, self._pos, self._rpos = (words.get_column(c).to_numpy() for c in ('_ID', 'POS', 'RPOS'))
+
+        runs = words.with_row_index('i').group_by('WORD', maintain_order=True).agg(pl.col('i').first(), pl.len())
+        self.vocab = runs.get_column('WORD')
+        self._starts = runs.get_column('i').to_numpy().astype(np.int64)
+        self._lens = runs.get_column('len').to_numpy().astype(np.int64)
+        self._word_nos = dict(zip(self.vocab, range(len(self.vocab))))
+
+    def ids(self, words: pl.Series, idx: Optional[int]) -> np.ndarray:
+        if len(words) == 1:
+            nos = np.array([self._word_nos[words[0]]] if words[0] in self._word_nos else [], dtype=np.int64)
+        else:
+            nos = np.flatnonzero(self.vocab.is_in(words.implode()).to_numpy())
+
+        starts, lens = self._starts[nos], self._lens[nos]
+        sel = np.repeat(starts - np.cumsum(lens) + lens, lens) + np.arange(lens.sum())
+        ids = self._ids[sel]
+        return ids if idx is None else ids[(self._pos if idx >= 0 else self._rpos)[sel] == idx]
+
+
+class WordIndex:
+    """Every word of a frame's PUZZLEs, exploded once at load and grouped by word, so WORD conditions look up row ids
+    (the _ID column) instead of running extract_all over every puzzle on every query. Kept in shards, one per
+    partition of the frame (a season, for syndicated), so a refresh only re-tokenizes the partitions it changed."""
+
+    def __init__(self):
+        self._shards = {}
+        self.vocab = pl.Series('WORD', [], pl.String)
+
+    def update(self, parts: Mapping[Hashable, pl.LazyFrame]):
+        for p, lf in parts.items():
+            self._shards[p] = _WordShard(lf)
+        self.vocab = pl.concat([s.vocab for s in self._shards.values()]).unique()
+
+    def rows(self, pattern: str, *, literal: bool = False, exact: bool = False, idx: Optional[int] = None) -> pl.Expr:
+        """Filter for the rows with a word (or the idx-th word, if given) that is exactly, contains or matches pattern.
+        Regex and literal patterns run once per distinct word."""
+        if exact:
+            words = pl.Series('WORD', [pattern])
+        else:
+            words = self.vocab.filter(self.vocab.str.contains(pattern, literal=literal).fill_null(False))
+
+        ids = np.concatenate([s.ids(words, idx) for s in self._shards.values()] + [np.empty(0, np.uint32)])
+        return pl.col('_ID').is_in(pl.Series(np.unique(ids), dtype=pl.UInt32).implode())
+
+
+# the literal scan below reads patterns the way polars runs them, in the syntax of Rust's regex crate, not Python's
+_INLINE_FLAGS = re.compile(r'\(\?[imsRUux-]+[:)]')
+_REPEAT = re.compile(r'\{(\d+)(?:,\d*)?\}\??')
+
+
+def _class_end(regex: str, i: int) -> int:
+    # just past the class whose [ is at i - 1. classes nest, and a ] first thing (after any ^) is a literal
+    i += regex[i] == '^'
+    i += regex[i] == ']'
+    while regex[i] != ']':
+        i = _class_end(regex, i + 1) if regex[i] == '[' else i + (2 if regex[i] == '\\' else 1)
+    return i + 1
+
+
+def _group_end(regex: str, i: int) -> int:
+    # just past the ) closing the group whose ( is at i - 1
+    depth = 1
+    while depth:
+        c = regex[i]
+        if c == '[':
+            i = _class_end(regex, i + 1)
+            continue
+        depth += (c == '(') - (c == ')')
+        i += 2 if c == '\\' else 1
+    return i
+
+
+def _required_literals(regex: str) -> list[str]:
+    """Runs of literal characters (3 or more) that every match of regex must contain, from a conservative scan of its top
+    level: groups, classes and other escapes just end a run. Anything it isn't sure how to read (alternation at the
+    top, inline flags, \\p/\\x escapes, stray brackets, a parse error) gives [], which is always safe."""
+    if _INLINE_FLAGS.search(regex):
+        return []
+    runs, run, i = [], '', 0
+    try:
+        while i < len(regex):
+            c = regex[i]
+            if c in '*+?{':
+                # repeats the atom before it. only if that was a literal is it still on the run: optional it drops
+                # out, repeated whatever comes next isn't adjacent to it anymore
+                if c == '{':
+                    if not (m := _REPEAT.match(regex, i)):
+                        return []
+                    optional, i = int(m[1]) == 0, m.end()
+                else:
+                    optional, i = c != '+', i + 1 + (regex[i + 1 : i + 2] == '?')
+                runs.append(run[:-1] if optional else run)
+                run = ''
+                continue
+
+            atom = None
+            if c == '\\':
+                if regex[i + 1] in 'pPxuU':
+                    return []
+                atom = None if regex[i + 1].isalnum() else regex[i + 1]
+                i += 2
+            elif c == '[':
+                i = _class_end(regex, i + 1)
+            elif c == '(':
+                i = _group_end(regex, i + 1)
+            elif c in '|)]}':
+                return []
+            else:
+                atom = None if c in '.^$' else c
+                i += 1
+
+            if atom is None:
+                runs.append(run)
+                run = ''
+            else:
+                run += atom
+    except IndexError:  # unterminated escape, class or group
+        return []
+    runs.append(run)
+    return [r for r in runs if len(r) >= 3]
+
+
+class _GramShard:
+    # one partition's (trigram, _ID) pairs, sorted so each trigram's postings are one contiguous run
+    def __init__(self, lf: pl.LazyFrame, col: str):
+        grams = (
+            lf.select(
+                '_ID',
+                col,
+                pl.int_ranges(0, pl.col(col).str.len_chars().cast(pl.Int64) - 2).alias('POS'),
+            )
+            .collect()
+            .explode('POS', empty_as_null=False, keep_nulls=False)
+            .select(pl.col(col).str.slice(pl.col('POS'), 3).alias('GRAM'), '_ID')
+            .unique()
+            .sort('GRAM', '_ID')
+        )
+        self._ids = grams.get_column('_ID').to_numpy()
+        runs = grams.with_row_index('i').group_by('GRAM', maintain_order=True).agg(pl.col('i').first(), pl.len())
+        self._spans = {g: (i, i + n) for g, i, n in runs.iter_rows()}
+
+    def candidates(self, grams: Iterable[str]) -> np.ndarray:
+        # intersect the shortest posting lists first, the candidates only shrink from there
+        postings = sorted((self._ids[slice(*self._spans.get(g, (0, 0)))] for g in grams), key=len)
+        return reduce(partial(np.intersect1d, assume_unique=True), postings)
+
+
+class TrigramIndex:
+    """Posting lists of every 3-character substring of one text column, by _ID, so a regex only runs on the rows that
+    hold every trigram of the literals it requires. Falls back to a full scan when it requires none. Sharded by
+    partition like WordIndex."""
+
+    def __init__(self, col: str):
+        self.col = col
+        self._shards = {}
+        self._row_ids = np.empty(0, np.uint32)
+        self._text = pl.Series(col, [], pl.String)
+
+    def update(self, lf: pl.LazyFrame, parts: Mapping[Hashable, pl.LazyFrame]):
+        """lf is the whole (rebuilt) frame, parts just its partitions that changed."""
+        for p, part in parts.items():
+            self._shards[p] = _GramShard(part, self.col)
+        text = lf.select('_ID', self.col).collect()
+        # _ID increases down the frame, so a searchsorted finds the rows of candidate ids
+        self._row_ids, self._text = text.get_column('_ID').to_numpy(), text.get_column(self.col)
+
+    def rows(self, pattern: str, *, literal: bool = False) -> pl.Expr:
+        """Filter for the rows where col contains (literal) or matches pattern."""
+        grams = {r[i : i + 3] for r in ([pattern] if literal else _required_literals(pattern)) for i in range(len(r) - 2)}
+        if not grams:
+            return pl.col(self.col).str.contains(pattern, literal=literal)
+
+        # ids never repeat across shards, so each shard narrows down on its own
+        cands = np.concatenate([s.candidates(grams) for s in self._shards.values()] + [np.empty(0, np.uint32)])
+        if len(cands) > len(self._text) // 4:
+            # not selective enough to beat the plain scan
+            return pl.col(self.col).str.contains(pattern, literal=literal)
+        text = self._text.gather(np.searchsorted(self._row_ids, cands))
+        hits = text.str.contains(pattern, literal=literal).fill_null(False).to_numpy()
+        return pl.col('_ID').is_in(pl.Series(cands[hits], dtype=pl.UInt32).implode())
+
+
 class WheelCompendium:
     _MAX_CACHE = 64
     _CACHE_GETTER = attrgetter('cache')
 
-    def __init__(self, *, loop=None, debug: bool = False):
+    def __init__(self, *, loop=None, debug: bool = False, cache_dir: str = _PAGE_CACHE_DIR):
         self._loop = loop
         self._debug = debug
+        self.cache_dir = cache_dir
         self.cache = LFUCache(self._MAX_CACHE)
 
         self.dfs = {t: None for t in ('syndicated', 'primetime', 'kids', 'daytime', 'au', 'gb')}
@@ -51,6 +268,12 @@ class WheelCompendium:
         self._coverage_dict = SortedDict()
 
         self.join_cache = {}
+        self.word_index = {}
+        self.trigram_index = {}
+        # partitions of the derived syndicated tables, see load
+        self._sched_parts = SortedDict()
+        self._sched_join_parts = SortedDict()
+        self._choices_parts = SortedDict()
 
         self._cols = {
             'syndicated': [
@@ -100,7 +323,7 @@ class WheelCompendium:
         return self._df_syndicated_dict.keys()
 
     def check_dups(self, season, lf: pl.LazyFrame):
-        dup = lf.drop('_lc').collect().is_duplicated()
+        dup = lf.drop(cs.starts_with('_')).collect().is_duplicated()
         if dup.any():
             self.sanity_checks.add(
                 f'{season} has entire duplicated rows. Check the <tr> tags:\n\n'
@@ -112,41 +335,75 @@ class WheelCompendium:
         # if dup2.any():
         # self.sanity_checks.add(f'{season} has multiple same rounds within a DATE. Double-check typos:\n\n' + str(lf.select('DATE', 'RD').collect().filter(dup).unique()) + '\n')
 
+    def _season_frames(self, seasons: Iterable[int]) -> list[pl.LazyFrame]:
+        return [self._df_syndicated_dict[s] for s in seasons if s in self._df_syndicated_dict]
+
+    def _update_indexes(self, k, parts: Mapping[Hashable, pl.LazyFrame]):
+        if k not in self.word_index:
+            cols = self.dfs[k].collect_schema().names()
+            self.word_index[k] = WordIndex()
+            self.trigram_index[k] = {c: TrigramIndex(c) for c in ('PUZZLE', 'CLUE/BONUS', 'BONUS') if c in cols}
+        self.word_index[k].update(parts)
+        for ti in self.trigram_index[k].values():
+            ti.update(self.dfs[k], parts)
+
     async def load(self, pages: Collection[int | str]):
         self.loaded = False
         _log.info('start loading wc at ' + str(datetime.now()))
 
-        changed_cov = await asyncio.gather(*(self._load_season(p) for p in pages))
-        # changed_cov = [await self._load_season(p) for p in pages]
-        changed_syndicated = {p for p in pages if type(p) is int}
-        choices_update = False
+        versions = await self._page_versions()
+        changed_cov = await asyncio.gather(*(self._load_season(p, versions) for p in pages))
+        # changed_cov = [await self._load_season(p, versions) for p in pages]
+
+        # every derived table is kept in partitions and only the ones depending on a (re)loaded page get rebuilt:
+        # syndicated, its indexes & its sched join by season, its sched by sched page, its choices by choices page.
+        # the pages cover the same season ranges the refresh command downloads them by
+        seasons = sorted(p for p in pages if type(p) is int)
+        named = {p for p in pages if type(p) is str}
+        sched_blocks = {str((s - 1) // 10 + 1) for s in seasons} | {p[-2] for p in named if re.fullmatch(r'sched\d0', p)}
+        choices_blocks = {b for b, r in _CHOICES_SEASONS.items() if any(s in r for s in seasons)} | {
+            p[-2] for p in named if re.fullmatch(r'choices\d0', p)
+        }
 
-        if changed_syndicated:
+        if seasons := sorted(self._df_syndicated_dict.keys() & seasons):
+            for s in seasons:
+                self._df_syndicated_dict[s] = self._df_syndicated_dict[s].with_columns(_row_ids(s)).collect().lazy()
+                self.check_dups(s, self._df_syndicated_dict[s])
             self.dfs['syndicated'] = pl.concat(self._df_syndicated_dict.values()).collect().lazy()
-            choices_update = any(s >= 35 for s in changed_syndicated)
-            self.check_dups('syndicated', self.dfs['syndicated'])
+            self._update_indexes('syndicated', {s: self._df_syndicated_dict[s] for s in seasons})
 
         for k in self.dfs.keys():
-            if k in pages:
-                self.dfs[k] = self.dfs[k].collect().lazy()
+            if k in named:
+                self.dfs[k] = self.dfs[k].with_columns(_row_ids()).collect().lazy()
                 self.check_dups(k, self.dfs[k])
-
-        self.df_sched['syndicated'] = pl.concat(self._df_schedsyn_dict.values())
-        self.df_sched['syndicated'] = (
-            self.dfs['syndicated']
-            .select('S', 'EP', 'E/S')
-            .unique(maintain_order=True)
-            .join(self.df_sched['syndicated'], 'EP')
-            .select('S', 'DATE', 'DATE_STR', 'EP', 'E/S', 'RED', 'YELLOW', 'BLUE', 'THEME')
-            .collect()
-            .lazy()
-        )
-
-        for t in ('syndicated', 'primetime'):
-            self.join_cache[f'sched_{t}'] = (
-                self.dfs[t]
+                self._update_indexes(k, {0: self.dfs[k]})
+
+        for b in sched_blocks & self._df_schedsyn_dict.keys():
+            if frames := self._season_frames(range(10 * int(b) - 9, 10 * int(b) + 1)):
+                self._sched_parts[b] = (
+                    pl.concat(frames)
+                    .select('S', 'EP', 'E/S')
+                    .unique(maintain_order=True)
+                    .join(self._df_schedsyn_dict[b], 'EP')
+                    .select('S', 'DATE', 'DATE_STR', 'EP', 'E/S', 'RED', 'YELLOW', 'BLUE', 'THEME')
+                    .collect()
+                    .lazy()
+                )
+        if sched_blocks:
+            self.df_sched['syndicated'] = pl.concat(self._sched_parts.values()).collect().lazy()
+
+        # the sched side is small, every season joins all of it
+        if join_seasons := {s for s in self._df_syndicated_dict if str((s - 1) // 10 + 1) in sched_blocks}:
+            sched = self.df_sched['syndicated'].drop(cs.contains('DATE'), 'S', 'E/S')
+            for s in join_seasons:
+                self._sched_join_parts[s] = self._df_syndicated_dict[s].join(sched, on='EP', how='left').collect().lazy()
+            self.join_cache['sched_syndicated'] = pl.concat(self._sched_join_parts.values()).collect().lazy()
+
+        if named & {'primetime', 'schedprimetime'}:
+            self.join_cache['sched_primetime'] = (
+                self.dfs['primetime']
                 .join(
-                    self.df_sched[t].drop(cs.contains('DATE'), 'S', 'E/S', strict=False),
+                    self.df_sched['primetime'].drop(cs.contains('DATE'), 'S', 'E/S', strict=False),
                     on='EP',
                     how='left',
                 )
@@ -156,37 +413,29 @@ class WheelCompendium:
 
         # choice checks
 
-        built_dfs = []
-
         for k, v in self._internal_df_choices.items():
-            if not (choices_update if k == 'syndicated' else k in pages):
-                continue
-
             if k == 'syndicated':
                 cdfs = [
-                    (
-                        k2,
-                        (pl.col('S').is_between(35, 40) if k2 == '4' else pl.col('S').is_between(41, 50)),
-                        v2,
-                    )
-                    for k2, v2 in v.items()
+                    (k2, v2) for k2, v2 in v.items() if k2 in choices_blocks and self._season_frames(_CHOICES_SEASONS[k2])
                 ]
+            elif named & {'primetime', 'choicesprimetime'}:
+                cdfs = [(None, v)]
             else:
-                cdfs = [(None, None, v)]
+                continue
 
-            for k2, f, cdf in cdfs:
+            for k2, cdf in cdfs:
                 df = (
                     (
-                        self.dfs['syndicated']
-                        .filter(f, RD='BR')
-                        .select('S', 'DATE', 'EP', 'E/S', 'PUZZLE', 'CATEGORY', '_lc')
+                        pl.concat(self._season_frames(_CHOICES_SEASONS[k2]))
+                        .filter(RD='BR')
+                        .select('S', 'DATE', 'EP', 'E/S', 'PUZZLE', 'CATEGORY', *LETTER_COLS, '_ID')
                         .join(cdf, on='DATE', how='outer')
                     )
                     if k == 'syndicated'
                     else (
                         self.dfs['primetime']
                         .filter(RD='BR')
-                        .select('DATE', 'EP', 'HH', 'PUZZLE', 'CATEGORY', '_lc')
+                        .select('DATE', 'EP', 'HH', 'PUZZLE', 'CATEGORY', *LETTER_COLS, '_ID')
                         .join(cdf, on=['DATE', 'HH'], how='outer')
                     )
                 )
@@ -213,7 +462,7 @@ class WheelCompendium:
                         + str(mismatch.get_column('EP_right').to_list())
                     )
 
-                built_dfs.append(
+                built = (
                     df.select(
                         pl.col(['S', 'DATE', 'EP', 'E/S'] if k == 'syndicated' else ['DATE', 'EP', 'HH']),
                         'PUZZLE',
@@ -222,16 +471,20 @@ class WheelCompendium:
                         pl.col('CAT1').alias('CHOICE1'),
                         pl.col('CAT2').alias('CHOICE2'),
                         pl.col('CAT3').alias('CHOICE3'),
-                        '_lc',
+                        *LETTER_COLS,
+                        '_ID',
                     )
+                    .collect()
+                    .lazy()
                 )
 
-            if choices_update and k == 'syndicated':
-                self.df_choices['syndicated'] = pl.concat(built_dfs).collect().lazy()
-            else:
-                self.df_choices['primetime'] = built_dfs[0].collect().lazy()
+                if k == 'syndicated':
+                    self._choices_parts[k2] = built
+                else:
+                    self.df_choices['primetime'] = built
 
-            built_dfs.clear()
+            if k == 'syndicated' and cdfs:
+                self.df_choices['syndicated'] = pl.concat(self._choices_parts.values()).collect().lazy()
 
         if any(changed_cov):
             self._reset_coverage()
@@ -284,34 +537,84 @@ class WheelCompendium:
 
         return c_df.with_columns((100.0 * pl.col('COV') / pl.col('MAX')).round(1).alias('PCT'))
 
-    async def _load_season(self, season: int | str) -> bool:
+    async def _page_versions(self) -> dict[str, str]:
+        # what each cached page is validated against: the Dropbox content hash, or size & mtime of the local file.
+        # one listing for every page, so an unchanged page costs no download at all
+        try:
+            if self._debug:
+                return {
+                    e.name.removesuffix('.csv'): f'{e.stat().st_size}-{e.stat().st_mtime_ns}'
+                    for e in os.scandir(_LOCAL_DIR)
+                    if e.name.endswith('.csv')
+                }
+            hashes = await asyncio.to_thread(dropboxwayo.content_hashes, _DROPBOX_DIR)
+            return {k.removesuffix('.csv'): v for k, v in hashes.items() if k.endswith('.csv')}
+        except Exception as e:
+            _log.warning(f'could not list compendium page versions, downloading every page: {e}')
+            return {}
+
+    def _page_cache_fn(self, s_str: str, version: str):
+        h = hashlib.blake2b(f'{_PAGE_CACHE_VERSION}|{version}'.encode(), digest_size=16)
+        return os.path.join(self.cache_dir, f'{s_str}-{h.hexdigest()}.parquet')
+
+    @staticmethod
+    def _read_cached_page(cache_fn):
+        try:
+            return pl.read_parquet(cache_fn, memory_map=True)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            _log.warning(f'could not read cached page {cache_fn}, downloading it again: {e}')
+            return None
+
+    def _save_cached_page(self, cache_fn, df: pl.DataFrame):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # only the latest version of a page is ever useful
+            stem = os.path.basename(cache_fn).rsplit('-', 1)[0]
+            for old in os.listdir(self.cache_dir):
+                if old.rsplit('-', 1)[0] == stem:
+                    os.remove(os.path.join(self.cache_dir, old))
+            df.write_parquet(cache_fn + '.tmp')
+            os.replace(cache_fn + '.tmp', cache_fn)
+        except Exception as e:
+            _log.warning(f'could not cache page {cache_fn}: {e}')
+
+    async def _load_season(self, season: int | str, versions: Mapping[str, str]) -> bool:
         is_syn = type(season) is int
         s_str = f's{season:02d}' if is_syn else season
 
-        async with self.sem:
+        cache_fn = self._page_cache_fn(s_str, versions[s_str]) if s_str in versions else None
+        df = await asyncio.to_thread(self._read_cached_page, cache_fn) if cache_fn else None
+
+        if df is None:
+            async with self.sem:
+                try:
+                    if self._debug:
+                        async with aiofile.async_open(os.path.join(_LOCAL_DIR, f'{s_str}.csv')) as afp:
+                            file = await afp.read()
+                    else:
+                        file = await asyncio.to_thread(dropboxwayo.download, f'{_DROPBOX_DIR}/{s_str}.csv')
+                except Exception as e:
+                    # _log.warning(e)
+                    location = 'locally' if self._debug else 'from Dropbox'
+                    _log.warning(f'Could not download {s_str} {location}')
+                    return
+
             try:
-                if self._debug:
-                    async with aiofile.async_open(
-                        os.path.expanduser(f'~/Dropbox/heroku/wayo-py/compendium/{s_str}.csv')
-                    ) as afp:
-                        file = await afp.read()
-                else:
-                    file = await asyncio.to_thread(dropboxwayo.download, f'/heroku/wayo-py/compendium/{s_str}.csv')
-            except Exception as e:
-                # _log.warning(e)
-                location = 'locally' if self._debug else 'from Dropbox'
-                _log.warning(f'Could not download {s_str} {location}')
-                return
+                df = pl.read_csv(
+                    file.encode() if self._debug else file,
+                    dtypes={'EP': pl.UInt16, 'ROUND': pl.Categorical('lexical')},
+                    truncate_ragged_lines=True,
+                )
+            except pl.exceptions.ComputeError as e:
+                _log.error(f'season {season} could not load correctly')
+                raise e
 
-        try:
-            df = pl.read_csv(
-                file.encode() if self._debug else file,
-                dtypes={'EP': pl.UInt16, 'ROUND': pl.Categorical('lexical')},
-                truncate_ragged_lines=True,
-            ).lazy()
-        except pl.exceptions.ComputeError as e:
-            _log.error(f'season {season} could not load correctly')
-            raise e
+            if cache_fn:
+                await asyncio.to_thread(self._save_cached_page, cache_fn, df)
+
+        df = df.lazy()
 
         if not is_syn and re.match(r'choices\d0', season):
             self._internal_df_choices['syndicated'][season[-2]] = df.select(
@@ -343,7 +646,7 @@ class WheelCompendium:
         else:
             # meta search columns
             meta_exprs = [
-                pl.col('PUZZLE').str.extract_all('[A-Z]').list.eval(pl.element().value_counts(), parallel=True).alias('_lc')
+                pl.col('PUZZLE').str.count_matches(c, literal=True).cast(pl.UInt8).alias(f'_{c}') for c in ascii_uppercase
             ]
 
             if is_syn or season == 'primetime':
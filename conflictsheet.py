@@ -1,17 +1,24 @@
+import atexit
 import bisect
 import enum
 import io
 import itertools
+import logging
 import operator
 import pickle
 import re
-from collections import OrderedDict
+import sys
+import threading
+import zipfile
+from collections import Counter, OrderedDict, defaultdict
 from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
 from copy import copy
 from random import choice, choices, random, sample, shuffle
 from operator import attrgetter, or_
 from functools import partial, reduce
 from string import ascii_uppercase
+from datetime import datetime
 from typing import *
 
 import numpy as np
@@ -36,9 +43,16 @@ SECOND_HALF = frozenset({4, 5, 6})
 ANY_FLAG = frozenset()
 ANY_FREQ = frozenset()
 
-from util import PLAYING_FLAGS, SORT_PROD
+from util import PLAYING_FLAGS
 from util_expr import build_flag_expr as has_any_flags
 
+_log = logging.getLogger('wayo_log')
+
+ERAS = ('daytime', 'primetime', 'syndicated', 'unaired')
+
+# the binary store is the canonical copy of the lineups. the workbook is just an export now.
+STORE_FN = 'Price_is_Right_Frequency.zip'
+EXCEL_FN = 'Price_is_Right_Frequency.xlsx'
 
 _pf_bit_mapping = {pf: len(PLAYING_FLAGS) - 1 - PLAYING_FLAGS.index(pf) for pf in ('^', '?', 'MDG')}
 
@@ -87,11 +101,138 @@ class SlotCertainty(enum.IntFlag):
 UNAIRED_DUPLICATES = ['0013R', '58XXD']
 
 
+def _write_frames(frames: Mapping[str, pl.DataFrame]) -> io.BytesIO:
+    fp = io.BytesIO()
+    with zipfile.ZipFile(fp, 'w', zipfile.ZIP_STORED) as zf:
+        for era, df in frames.items():
+            with io.BytesIO() as b:
+                df.write_ipc(b, compression='zstd')
+                zf.writestr(f'{era}.arrow', b.getvalue())
+    fp.seek(0)
+    return fp
+
+
+def _read_frames(fp, eras: Optional[Iterable[str]] = None) -> OrderedDict:
+    with zipfile.ZipFile(fp) as zf:
+        members = [n.removesuffix('.arrow') for n in zf.namelist()]
+        return OrderedDict(
+            (era, pl.read_ipc(zf.read(f'{era}.arrow'), memory_map=False)) for era in (eras or members) if era in members
+        )
+
+
+PG_ORDINAL = {pg: i for i, pg in enumerate(PG)}
+_PG_WORDS = (len(PG_ORDINAL) + 63) // 64
+
+
+def _pg_bitset(pgs: Iterable[PG]) -> np.ndarray:
+    bits = np.zeros(_PG_WORDS, dtype=np.uint64)
+    for pg in pgs:
+        bits[PG_ORDINAL[pg] // 64] |= np.uint64(1) << np.uint64(PG_ORDINAL[pg] % 64)
+    return bits
+
+
+def _flag_codes_match(codes: np.ndarray, flags: Optional[frozenset[int]]) -> np.ndarray:
+    # numpy mirror of build_flag_expr, over the distinct flag values of an era
+    if not flags:
+        return np.ones(codes.shape, dtype=bool)
+    m = np.zeros(codes.shape, dtype=bool)
+    if 0 in flags:
+        m |= codes == 0
+    if flags != {0}:
+        m |= (codes & reduce(or_, flags - {0})) != 0
+    return m
+
+
+_EPOCH_ORDINAL = datetime(1970, 1, 1).toordinal()
+
+
+def _epoch_day(d) -> int:
+    # date or datetime --> days since 1970-01-01, what a Date column is underneath
+    return d.toordinal() - _EPOCH_ORDINAL
+
+
+# daytime production order is suffix first, then number. R tapes sort in with the D's
+_PROD_SUFFIX_RANK = {'D': 0, 'R': 0, 'K': 1, 'L': 2, 'X': 3}
+_DAY_PROD = re.compile(r'(\d{3}[1-5]|58XX)[DKLRX]')
+
+
+def prod_key(prod: str) -> int:
+    """Integer sort key of a daytime production number, the python mirror of _PKEY in _parse_era:
+    xxxx[DKLRX] --> rank of the suffix * 10000 + xxxx, with 58XXD as 5811."""
+    return _PROD_SUFFIX_RANK[prod[-1]] * 10_000 + int(prod[:-1].replace('XX', '11', 1))
+
+
+def _prod_key_expr(col: str = 'PROD') -> pl.Expr:
+    return pl.col(col).str.slice(-1).replace_strict(_PROD_SUFFIX_RANK, return_dtype=pl.UInt32) * 10_000 + pl.col(
+        col
+    ).str.head(-1).str.replace('XX', '11', literal=True).cast(pl.UInt32)
+
+
 pct_chance = lambda pct: random() < pct / 100
 
 
+def _estimated_size(value):
+    return value.estimated_size() if isinstance(value, pl.DataFrame) else sys.getsizeof(value)
+
+
+class QueryCache(LFUCache):
+    """LFU cache of collected query results, bounded by their total estimated size in bytes instead of a count.
+    Counts evictions & invalidations per tag (the first element of every key); hits & misses are counted there too,
+    by the methods filling it."""
+
+    def __init__(self, maxbytes: int):
+        super().__init__(maxbytes, getsizeof=_estimated_size)
+        self.stats = defaultdict(Counter)
+
+    def popitem(self):
+        key, value = super().popitem()
+        self.stats[key[0]]['evictions'] += 1
+        return key, value
+
+    def invalidate(self, key):
+        del self[key]
+        self.stats[key[0]]['invalidations'] += 1
+
+
+def _canonical_endpoints(endpoints, time):
+    # every way of asking for the same rows should land on the same key
+    if not endpoints or (time == 'primetime' and type(endpoints.lower) is int):
+        return None
+    return endpoints
+
+
+def _canonical_pg_queries(pgQueries, pgFlags):
+    # the concurrence filters are ANDed, so order doesn't matter. no flags is no flags, None or empty
+    return tuple(sorted(((pg, pgf or None) for pg, pgf in zip(pgQueries, pgFlags)), key=lambda t: PG_ORDINAL[t[0]]))
+
+
+_PG_LIST = list(PG)
+_PARTITION_MASKS = {
+    name: np.isin(np.arange(len(PG_ORDINAL)), [PG_ORDINAL[pg] for pg in pgs]) for name, pgs in PG.partition_table.items()
+}
+
+# the percentages the "smart" lineup generator runs on. tune against ConflictSheet.calibration_report.
+GEN_PCTS = {
+    'cash': 70,
+    'cash_1st_no_golden_road': 98,
+    'third_car': 2,
+    'non_car': 4,
+    'car_respect_halves': 93,
+    'no_car_3rd_4th': 99.5,
+    'golden_road_1st': 95,
+    'fill_fees': 95,
+    'fee_respect_halves': 95,
+    '4p': 27,
+    '3p': (30, 3),  # no 4 prizer / 4 prizer
+    '2p': (75, 40, 0.5),  # no 3 prizer / 3 prizer / 3 & 4 prizers
+    '1+p': (65, 10, 0.25),  # at most a 2 prizer / one of a 3 or 4 prizer / 2+ multiprizers already
+}
+
+
 class ConflictSheet:
-    _MAX_CACHE = 64
+    _MAX_CACHE_BYTES = 64 * 2**20
+    _MAX_CHUNKS = 16
+    _SAVE_DELAY = 30
     _CACHE_GETTER = attrgetter('cache')
 
     def __init__(
@@ -101,16 +242,66 @@ class ConflictSheet:
     ):
         self.load_func = load_func
         self.save_func = save_func
-        self.cache = LFUCache(self._MAX_CACHE)
+        self.cache = QueryCache(self._MAX_CACHE_BYTES)
+        self.cache_lock = threading.RLock()
         self._df_dict = OrderedDict()
+        # eras are read (and indexed) from _source on first access, one lock each so eras load independently
+        self._source = None
+        self._loaded = set()
+        self._era_locks = {era: threading.Lock() for era in ERAS}
+        self._cooc = {}
+        self._slot_facts = {}
+        self._slot_rollup = {}
+        self._lineup_index = {}
+        self._playing_vocab = {}
+        self._prod_index = {}
+        self._date_index = {}
+        self._playing_index = {}
+        # bumped by update, per era: lineup is any change to which rows exist or what was played in them,
+        # meta any edit at all (notes & dates included). searches are cached against the one(s) they read.
+        self._lineup_version = Counter()
+        self._meta_version = Counter()
+        # bumped along with every invalidation of the other cached queries, see _cached
+        self._edits = Counter()
+        self._save_lock = threading.Lock()
+        self._save_timer = None
+        self._closed = False
+        self.dirty = False
+        self.excel_stale = False
         self.initialize()
         self.notes = COMPENDIUM_NOTES
+        atexit.register(self.close)
 
     def get(self, time: str):
+        self.ensure_loaded(time)
         return self._df_dict[time]
 
-    def is_ready(self):
-        return bool(self._df_dict)
+    def is_ready(self, time: Optional[str] = None):
+        """Whether era time (or every era, if not given) is loaded and indexed."""
+        return time in self._loaded if time else self._loaded.issuperset(ERAS)
+
+    def ensure_loaded(self, time: str):
+        if time in self._loaded:
+            return
+        with self._era_locks[time]:
+            if time in self._loaded:
+                return
+            _log.info(f'start loading cs {time} at {datetime.now()}')
+            self._df_dict[time] = self._source(time)
+            self._build_cooccurrence(time)
+            self._build_slot_facts(time)
+            self._build_lineup_index(time)
+            self._build_row_indexes(time)
+            self._build_playing_index(time)
+            self._loaded.add(time)
+            _log.info(f'end loading cs {time} at {datetime.now()}')
+
+    def load(self, eras: Iterable[str] = ERAS):
+        """Load every era of eras that isn't yet, in parallel."""
+        todo = [era for era in eras if era not in self._loaded]
+        if todo:
+            with ThreadPoolExecutor(len(todo)) as ex:
+                list(ex.map(self.ensure_loaded, todo))
 
     def gen_sheet(
         self,
@@ -133,14 +324,7 @@ class ConflictSheet:
         ttable.set_precision(1)
 
         sub_slots_df = self.endpoint_sub(endpoints, time, table='slots')
-        # permutation must be done to match both possible orders of pg1/pg2, so do the more costly operation once
-        pg_pair_perms = set(itertools.permutations([str(pg) for pg in pgs], 2))
-
-        pg_pair_dict = Counter()
-        for r in self.endpoint_sub(endpoints, time).select(cs.matches(r'^PG\d_p$')).collect().rows():
-            for pg1, pg2 in set(itertools.combinations(r, 2)) & pg_pair_perms:
-                pg_pair_dict[pg1, pg2] += 1
-                pg_pair_dict[pg2, pg1] += 1
+        pg_pairs = self.pair_counts(endpoints, time, pgs)
 
         nums = np.zeros((6, 8), dtype=int)
         hundo = False
@@ -148,8 +332,8 @@ class ConflictSheet:
             row = [pgp]
             pg = pgp.pg
 
-            pg_conf = [pg_pair_dict[str(pg), str(pgs[j - 1])] if i != j else '-' for j in range(1, 7)]
-            nums[i - 1, :6] = [i if type(i) is int else 0 for pgc in pg_conf]
+            pg_conf = [int(pg_pairs[i - 1, j - 1]) if i != j else '-' for j in range(1, 7)]
+            nums[i - 1, :6] = [pgc if type(pgc) is int else 0 for pgc in pg_conf]
             row.extend(pg_conf)
 
             ssd_pg = (
@@ -173,173 +357,278 @@ class ConflictSheet:
                     max(len(str(pgp)) for pgp in pg_playings),
                 )
             ]
-            + [max(3, 1 + int(np.log10(n.max()))) for n in nums.T]
+            + [max(3, len(str(n.max()))) for n in nums.T]
             + [5 if hundo else 4]
         )
 
         return ttable.draw()
 
-    def _pick_slot(self, pg, initial_slots):
-        slots = copy(initial_slots)
-        if pg in PG.partition_table['NO_OPENING_ACT']:
-            slots -= {1, 2}
-        elif pg in PG.partition_table['NO_FIRST']:
-            slots -= {1}
-        if not slots:
-            slots = copy(initial_slots)
-        return choice(tuple(slots))
-
-    def gen_lineup(self, pg_sample: Set[PG], half_hour: bool = False):
-        nPGs = [None] * (3 if half_hour else 6)
-        non_car = [None] * (3 if half_hour else 6)
-        unused_slots = set(range(1, 7))
-        unused_fees = ['GP', 'SP']
-        halves = [{1, 2, 3}, {4, 5, 6}]
-        unused_fee_halves = [0, 1]
+    def gen_lineup(self, pg_sample: Set[PG]):
+        # the odd draw that the rules paint into a corner is dropped by the batch, so ask for a few
+        ords, non_car, ok = self.gen_lineups(pg_sample, 16)
+        if not ok.any():
+            raise ValueError('Could not generate a lineup from the given games.')
+        i = ok.argmax()
+        return [_PG_LIST[o] for o in ords[i]], non_car[i].tolist()
+
+    def gen_lineups(
+        self, pg_sample: Set[PG], n: int, pcts: Optional[dict] = None, rng: Optional[np.random.Generator] = None
+    ):
+        """Generate n "smart" full-hour lineups out of pg_sample at once, all over PG ordinals.
+
+        Returns (ords, non_car, ok): ords is (n, 6) PG ordinals, non_car (n, 6) whether that slot is a non-car game
+        played for a car, and ok is False for any row that could not be completed (its ords are partially -1).
+        pcts overrides entries of GEN_PCTS."""
+        pcts = GEN_PCTS | (pcts or {})
+        rng = rng or np.random.default_rng()
+        pm = _PARTITION_MASKS
+        rows = np.arange(n)
+        half_of_slot = np.arange(6) // 3
+
+        avail = np.zeros((n, len(PG_ORDINAL)), dtype=bool)
+        avail[:, [PG_ORDINAL[pg] for pg in pg_sample]] = True
+        lineup = np.full((n, 6), -1, dtype=np.int16)
+        non_car = np.zeros((n, 6), dtype=bool)
+        unused = np.ones((n, 6), dtype=bool)
+        fee_unused = np.ones((n, 2), dtype=bool)  # GP, SP
+        fee_half_unused = np.ones((n, 2), dtype=bool)
+        ok = np.ones(n, dtype=bool)
+
+        def chance(pct):
+            return rng.random(n) * 100 < pct
+
+        def choose(mask, active):
+            # uniform pick of one True column per active row, -1 if there is none
+            keys = np.where(mask, rng.random(mask.shape), -1.0)
+            pick = keys.argmax(axis=1)
+            has = active & (keys[rows, pick] >= 0)
+            return np.where(has, pick, -1), has
+
+        def pick_slot(pgs, slots, active):
+            # keep games away from the opening act / first slot where they never play, unless there's no other way
+            noa = pm['NO_OPENING_ACT'][pgs]
+            restricted = slots.copy()
+            restricted[noa, :2] = False
+            restricted[~noa & pm['NO_FIRST'][pgs], 0] = False
+            restricted = np.where(restricted.any(axis=1, keepdims=True), restricted, slots)
+            return choose(restricted, active & (pgs >= 0))
+
+        def place(pgs, slots, placed):
+            lineup[rows[placed], slots[placed]] = pgs[placed]
+            unused[rows[placed], slots[placed]] = False
+
+        def multiprizer(name, pct, active):
+            mp, has = choose(avail & pm[name], active & chance(pct))
+            slot, placed = pick_slot(mp, unused, has)
+            ok[has & ~placed] = False
+            place(mp, slot, placed)
+            avail[placed] &= ~pm[name]
+            return placed
 
         # decide on cash or no cash.
-        casher = choice(tuple(pg_sample & PG.partition_table['CASH'])) if pct_chance(70) else None
-        cash_type = None if not casher else 'SP' if casher in PG.partition_table['SP/CASH'] else 'GP'
-        if casher:
-            slot = self._pick_slot(casher, unused_slots)
-            nPGs[slot - 1] = casher
-            unused_slots.remove(slot)
-            pg_sample -= PG.partition_table[f'{cash_type}']
-            if casher in PG.partition_table['BAILOUT']:
-                pg_sample -= PG.partition_table['BAILOUT']
-            unused_fees.remove(cash_type)
-            unused_fee_halves.remove((slot - 1) // 3)
-            if slot == 1 and pct_chance(98):
-                pg_sample.discard(PG.GoldenRoad)
+        casher, has = choose(avail & pm['CASH'], chance(pcts['cash']))
+        slot, placed = pick_slot(casher, unused, has)
+        place(casher, slot, placed)
+        sp = placed & pm['SP/CASH'][casher]
+        gp = placed & ~sp
+        avail[sp] &= ~pm['SP']
+        avail[gp] &= ~pm['GP']
+        avail[placed & pm['BAILOUT'][casher]] &= ~pm['BAILOUT']
+        fee_unused[sp, 1] = fee_unused[gp, 0] = False
+        fee_half_unused[rows[placed], half_of_slot[slot[placed]]] = False
+        avail[placed & (slot == 0) & chance(pcts['cash_1st_no_golden_road']), PG_ORDINAL[PG.GoldenRoad]] = False
 
         # now decide cars.
-        total_car_count = 3 if pct_chance(2) else 2
-        for ttc in range(total_car_count):
-            do_non_car = pct_chance(4)
-            car_sample = pg_sample & (PG.partition_table['NON-CAR'] if do_non_car else PG.partition_table['CAR'])
-
-            respect_halves = pct_chance(93)
-            slot_choices = copy(unused_slots)
-            if ttc == 0:
-                slot_choices &= halves[0]
-                if 0 not in unused_fee_halves and respect_halves:
-                    car_sample -= PG.partition_table['FEE']
-            if ttc == 1:
-                slot_choices &= halves[1]
-                if 1 not in unused_fee_halves and respect_halves:
-                    car_sample -= PG.partition_table['FEE']
-            if nPGs[2] in PG.partition_table['CAR'] and pct_chance(99.5):
-                slot_choices -= {4}
-
-            car = choice(tuple(car_sample))
-
-            if car == PG.GoldenRoad and not nPGs[0] and pct_chance(95):
-                slot = 1
-            else:
-                slot = self._pick_slot(car, slot_choices)
-            nPGs[slot - 1] = car
-            unused_slots.remove(slot)
-            non_car[slot - 1] = do_non_car
-            car_type = 'SP' if car in PG.partition_table['SP/CAR'] else 'GP' if car in PG.partition_table['GP/CAR'] else None
-            if car_type:
-                pg_sample -= PG.partition_table[f'{car_type}']
-                if respect_halves:
-                    unused_fees.remove(car_type)
-                    unused_fee_halves.remove((slot - 1) // 3)
-            else:
-                pg_sample.remove(car)
-
-        if len(unused_fees) == 2 or pct_chance(95):
-            shuffle(unused_fees)
-            shuffle(unused_fee_halves)
-            # fill in unused fees with regular fees, respecting halves most of the time.
-            for fee, half in zip(unused_fees, unused_fee_halves):
-                sample = pg_sample & PG.partition_table[f'REG. {fee}']
-                if sample:
-                    mp = choice(tuple(sample))
-                    respect_halves = pct_chance(95)
-                    slot = self._pick_slot(
-                        mp,
-                        unused_slots & halves[half] if respect_halves else unused_slots,
-                    )
-                    nPGs[slot - 1] = mp
-                    unused_slots.remove(slot)
-                    pg_sample -= PG.partition_table[f'REG. {fee}']
-
-        # decide on a 4 prizer or not.
-        do_4p = (
-            bool(pg_sample & PG.partition_table['4 PRIZER'])
-            and not (set(nPGs) & {PG.MoreOrLess, PG.FortuneHunter})
-            and pct_chance(27)
+        n_cars = np.where(chance(pcts['third_car']), 3, 2)
+        for ttc in range(3):
+            active = ok & (ttc < n_cars)
+            do_non_car = chance(pcts['non_car'])
+            car_sample = avail & np.where(do_non_car[:, None], pm['NON-CAR'], pm['CAR'])
+
+            respect_halves = chance(pcts['car_respect_halves'])
+            slot_choices = unused.copy()
+            if ttc < 2:
+                slot_choices[:, half_of_slot != ttc] = False
+                car_sample[~fee_half_unused[:, ttc] & respect_halves] &= ~pm['FEE']
+            slot_choices[pm['CAR'][lineup[:, 2]] & (lineup[:, 2] >= 0) & chance(pcts['no_car_3rd_4th']), 3] = False
+
+            car, has = choose(car_sample, active)
+            slot, placed = pick_slot(car, slot_choices, has)
+            golden_road = has & (car == PG_ORDINAL[PG.GoldenRoad]) & (lineup[:, 0] < 0) & chance(pcts['golden_road_1st'])
+            slot[golden_road] = 0
+            placed |= golden_road
+            ok[active & ~placed] = False
+
+            place(car, slot, placed)
+            non_car[rows[placed], slot[placed]] = do_non_car[placed]
+            sp = placed & pm['SP/CAR'][car]
+            gp = placed & ~sp & pm['GP/CAR'][car]
+            avail[sp] &= ~pm['SP']
+            avail[gp] &= ~pm['GP']
+            fee_unused[sp & respect_halves, 1] = fee_unused[gp & respect_halves, 0] = False
+            fee = (sp | gp) & respect_halves
+            fee_half_unused[rows[fee], half_of_slot[slot[fee]]] = False
+            plain = placed & ~sp & ~gp
+            avail[rows[plain], car[plain]] = False
+
+        # fill in unused fees with regular fees, respecting halves most of the time.
+        # the open fees get matched to the open halves at random, and go in random order.
+        do_fees = ok & (fee_unused.all(axis=1) | chance(pcts['fill_fees']))
+        swap = rng.random(n) < 0.5
+        both_halves = fee_half_unused.all(axis=1)
+        only_half = fee_half_unused.argmax(axis=1)
+        half_of_fee = np.stack([np.where(both_halves, swap, only_half), np.where(both_halves, ~swap, only_half)], axis=1)
+        gp_first = rng.random(n) < 0.5
+        for p in range(2):
+            fee_i = np.where(gp_first, p, 1 - p)
+            reg = np.where((fee_i == 0)[:, None], pm['REG. GP'], pm['REG. SP'])
+            mp, has = choose(avail & reg, do_fees & fee_unused[rows, fee_i])
+            respect_halves = chance(pcts['fee_respect_halves'])
+            in_half = half_of_slot == half_of_fee[rows, fee_i][:, None]
+            slot, placed = pick_slot(mp, unused & (in_half | ~respect_halves[:, None]), has)
+            ok[has & ~placed] = False
+            place(mp, slot, placed)
+            avail[placed] &= ~reg[placed]
+
+        # then the multiprizers, each less likely the more there already are.
+        no_4p = np.isin(lineup, [PG_ORDINAL[PG.MoreOrLess], PG_ORDINAL[PG.FortuneHunter]]).any(axis=1)
+        do_4p = multiprizer('4 PRIZER', pcts['4p'], ok & ~no_4p)
+        do_3p = multiprizer('3 PRIZER', np.where(do_4p, pcts['3p'][1], pcts['3p'][0]), ok)
+        do_2p = multiprizer(
+            '2 PRIZER',
+            np.select([do_4p & do_3p, do_3p], [pcts['2p'][2], pcts['2p'][1]], pcts['2p'][0]),
+            ok,
         )
-        if do_4p:
-            mp = choice(tuple(pg_sample & PG.partition_table['4 PRIZER']))
-            slot = self._pick_slot(mp, unused_slots)
-            nPGs[slot - 1] = mp
-            unused_slots.remove(slot)
-            pg_sample -= PG.partition_table['4 PRIZER']
-
-        # decide on a 3 prizer or not.
-        do_3p = bool(pg_sample & PG.partition_table['3 PRIZER']) and pct_chance(3 if do_4p else 30)
-        if do_3p:
-            mp = choice(tuple(pg_sample & PG.partition_table['3 PRIZER']))
-            slot = self._pick_slot(mp, unused_slots)
-            nPGs[slot - 1] = mp
-            unused_slots.remove(slot)
-            pg_sample -= PG.partition_table['3 PRIZER']
-
-        # decide on a 2 prizer or not.
-        do_2p = bool(pg_sample & PG.partition_table['2 PRIZER']) and pct_chance(
-            0.5 if do_4p and do_3p else 40 if do_3p else 75
+        multis = do_4p.astype(int) + do_3p + do_2p
+        multiprizer(
+            '1+ PRIZER',
+            np.select([multis >= 2, do_4p | do_3p], [pcts['1+p'][2], pcts['1+p'][1]], pcts['1+p'][0]),
+            ok & unused.any(axis=1),
         )
-        if do_2p:
-            mp = choice(tuple(pg_sample & PG.partition_table['2 PRIZER']))
-            slot = self._pick_slot(mp, unused_slots)
-            nPGs[slot - 1] = mp
-            unused_slots.remove(slot)
-            pg_sample -= PG.partition_table['2 PRIZER']
-
-        if unused_slots:
-            # decide on a 1+ prizer or not.
-            do_1plusp = bool(pg_sample & PG.partition_table['1+ PRIZER']) and pct_chance(
-                0.25 if (do_4p + do_3p + do_2p >= 2) else 10 if (do_4p + do_3p >= 1) else 25 if do_2p and do_3p else 65
+
+        # fill out remainder of lineup with 1 prizers.
+        for _ in range(6):
+            active = ok & unused.any(axis=1)
+            if not active.any():
+                break
+            mp, has = choose(avail & pm['1 PRIZER'], active)
+            slot, placed = pick_slot(mp, unused, has)
+            ok[active & ~placed] = False
+            place(mp, slot, placed)
+            avail[rows[placed], mp[placed]] = False
+
+        return lineup, non_car, ok & ~unused.any(axis=1)
+
+    def calibration_report(
+        self, n: int = 10000, seasons: Optional[Portion] = None, pcts: Optional[dict] = None
+    ) -> Tuple[pl.DataFrame, pl.DataFrame, pl.DataFrame]:
+        """Compare n generated lineups against the real full-hour daytime lineups of seasons (default, the last three),
+        generating from the games actually played in them. Returns three tables, all in percent of lineups:
+        game types, PGs (with the total variation distance between their real & generated slot spreads), and the
+        PG pairs that are the furthest off."""
+        seasons = seasons or P.closed(CURRENT_SEASON - 2, CURRENT_SEASON)
+        df = self.get('daytime')
+        real = self._lineup_index['daytime']['ords']
+        real = real[
+            df.select(pl.col('S').is_in(list(P.iterate(seasons, step=1))) & pl.col('PG6').is_not_null())
+            .to_series()
+            .to_numpy()
+        ]
+        if not len(real):
+            raise ValueError('No full-hour lineups in the given seasons.')
+
+        gen, _, ok = self.gen_lineups({_PG_LIST[o] for o in np.unique(real)}, n, pcts)
+        gen = gen[ok]
+
+        def membership(ords):
+            m = np.zeros((len(ords), len(PG_ORDINAL)), dtype=bool)
+            m[np.arange(len(ords))[:, None], ords] = True
+            return m
+
+        def slot_spread(ords):
+            counts = np.zeros((len(PG_ORDINAL), 6))
+            np.add.at(counts, (ords, np.broadcast_to(np.arange(6), ords.shape)), 1)
+            return counts / np.maximum(counts.sum(axis=1, keepdims=True), 1)
+
+        m_real, m_gen = membership(real), membership(gen)
+        pct = lambda a: np.round(100 * np.asarray(a), 1)
+
+        groups = ['CASH', 'CAR', 'NON-CAR', 'FEE', '4 PRIZER', '3 PRIZER', '2 PRIZER', '1+ PRIZER']
+
+        def group_rates(m):
+            rates = [(m & _PARTITION_MASKS[g]).any(axis=1).mean() for g in groups]
+            return pct(rates + [((m & _PARTITION_MASKS['CAR']).sum(axis=1) >= 3).mean()])
+
+        group_df = pl.DataFrame(
+            {'TYPE': groups + ['3+ CARS'], 'REAL': group_rates(m_real), 'GEN': group_rates(m_gen)}
+        ).with_columns(DIFF=pl.col('GEN') - pl.col('REAL'))
+
+        played = m_real.any(axis=0) | m_gen.any(axis=0)
+        pg_df = (
+            pl.DataFrame(
+                {
+                    'PG': [pg.sheetName for pg in PG],
+                    'REAL': pct(m_real.mean(axis=0)),
+                    'GEN': pct(m_gen.mean(axis=0)),
+                    'SLOT TVD': np.round(0.5 * np.abs(slot_spread(real) - slot_spread(gen)).sum(axis=1), 2),
+                }
             )
-            if do_1plusp:
-                mp = choice(tuple(pg_sample & PG.partition_table['1+ PRIZER']))
-                slot = self._pick_slot(mp, unused_slots)
-                nPGs[slot - 1] = mp
-                unused_slots.remove(slot)
-                pg_sample -= PG.partition_table['1+ PRIZER']
-
-        while unused_slots:
-            # fill out remainder of lineup with 1 prizers.
-            mp = choice(tuple(pg_sample & PG.partition_table['1 PRIZER']))
-            slot = self._pick_slot(mp, unused_slots)
-            nPGs[slot - 1] = mp
-            unused_slots.remove(slot)
-            pg_sample.remove(mp)
-
-        return nPGs, non_car
-
-    @cachedmethod(_CACHE_GETTER, key=partial(hashkey, 'ep_sub'))
+            .filter(pl.Series(played))
+            .with_columns(DIFF=pl.col('GEN') - pl.col('REAL'))
+            .sort(pl.col('DIFF').abs(), descending=True)
+        )
+
+        i, j = np.triu_indices(len(PG_ORDINAL), 1)
+        pair_real = (m_real.T.astype(np.int32) @ m_real)[i, j] / len(m_real)
+        pair_gen = (m_gen.T.astype(np.int32) @ m_gen)[i, j] / len(m_gen)
+        top = np.argsort(-np.abs(pair_gen - pair_real))[:25]
+        pair_df = pl.DataFrame(
+            {
+                'PG1': [_PG_LIST[k].sheetName for k in i[top]],
+                'PG2': [_PG_LIST[k].sheetName for k in j[top]],
+                'REAL': pct(pair_real[top]),
+                'GEN': pct(pair_gen[top]),
+            }
+        ).with_columns(DIFF=pl.col('GEN') - pl.col('REAL'))
+
+        return group_df, pg_df, pair_df
+
     def endpoint_sub(self, endpoints: Portion, time: str, *, table: str = 'df'):
+        if not (endpoints := _canonical_endpoints(endpoints, time)):
+            return self.get(time).lazy() if table == 'df' else self.slot_table(time, 'S' if time != 'primetime' else None)
+        return self._cached(('ep_sub', endpoints, time, table), time, self._endpoint_frame).lazy()
+
+    def _cached(self, key, time, compute):
+        """cache[key], else compute(*key[1:]), kept unless era time got edited while it ran: it may have read the
+        old frame, and the invalidation that was meant for it would have already gone by."""
+        stats = self.cache.stats[key[0]]
+        with self.cache_lock:
+            value = self.cache.get(key)
+            stats['hits' if value is not None else 'misses'] += 1
+            edits = self._edits[time]
+        if value is None:
+            value = compute(*key[1:])
+            with self.cache_lock:
+                if self._edits[time] == edits:
+                    try:
+                        self.cache[key] = value
+                    except ValueError:  # bigger than the whole cache
+                        pass
+        return value
+
+    def _endpoint_frame(self, endpoints: Portion, time: str, table: str):
         if table == 'df':
-            q = self._df_dict[time].lazy()
+            q = self.get(time).lazy()
         else:  # slot
-            q = self.slot_table(time, 'S' if time != 'primetime' else None)
+            q = self.slot_table(time, 'S')
 
-        if not endpoints:
-            return q
-        elif type(endpoints.lower) is not int:
+        if type(endpoints.lower) is not int:
             if table != 'df':
                 raise ValueError('Slots table does not support date start/end at this time.')
-            return q.filter(pl.col('AIRDATE').is_between(endpoints.lower, endpoints.upper))
-        elif time != 'primetime':
-            return q.filter(pl.col('S').is_in(list(P.iterate(endpoints, step=1))))
+            return self.airdate_rows(time, start=endpoints.lower, end=endpoints.upper)
         else:
-            return q
+            return q.filter(pl.col('S').is_in(list(P.iterate(endpoints, step=1)))).collect()
 
-    @cachedmethod(_CACHE_GETTER, key=partial(hashkey, 'cc'))
     def concurrence_query(
         self,
         endpoints: Portion,
@@ -347,50 +636,648 @@ class ConflictSheet:
         pgQueries: Tuple[PG],
         pgFlags: tuple[Optional[frozenset[int]]],
     ):
-        q = self.endpoint_sub(endpoints, time)
+        key = ('cc', _canonical_endpoints(endpoints, time), time, _canonical_pg_queries(pgQueries, pgFlags))
+        return self._cached(key, time, self._concurrence_frame).lazy()
 
-        pgs = [str(pg) for pg in pgQueries]
+    def _concurrence_frame(
+        self, endpoints: Optional[Portion], time: str, pg_queries: tuple[tuple[PG, Optional[frozenset[int]]]]
+    ):
+        q = self.endpoint_sub(endpoints, time)
         pg_end_label = 3 if time == 'syndicated' else 6
 
-        for pg, pgf in zip(pgs, pgFlags):
+        for pg, pgf in pg_queries:
             if pgf:
-                exprs = [(pl.col(f'PG{i}_p') == pg) & (has_any_flags(f'PG{i}_f', pgf)) for i in range(1, pg_end_label + 1)]
+                exprs = [
+                    (pl.col(f'PG{i}_p') == str(pg)) & (has_any_flags(f'PG{i}_f', pgf)) for i in range(1, pg_end_label + 1)
+                ]
                 q = q.filter(pl.any_horizontal(exprs))
             else:
-                q = q.filter(pl.any_horizontal(cs.matches(f'^PG[1-{pg_end_label}]_p$') == pg))
-
-        return q
+                q = q.filter(pl.any_horizontal(cs.matches(f'^PG[1-{pg_end_label}]_p$') == str(pg)))
+
+        return q.collect()
+
+    def data_version(self, time: str, meta: bool = False) -> tuple[int, ...]:
+        """Version of era time's lineups, plus that of its notes & dates if meta."""
+        return (self._lineup_version[time], self._meta_version[time]) if meta else (self._lineup_version[time],)
+
+    def search_lineups(
+        self, time: str, key: Hashable, compute: Callable[[pl.DataFrame], np.ndarray], meta: bool = False
+    ) -> pl.DataFrame:
+        """The lineups found by the search identified by key, in result order. Its row indices (into get(time)) are
+        cached until the data it depends on changes, else they're compute(df). meta is whether the search reads notes
+        or dates."""
+        self.ensure_loaded(time)
+        stats = self.cache.stats['search']
+        # under the lock update writes under, so the rows, the frame they index and the version all agree
+        with self._era_locks[time]:
+            k = ('search', time, self.data_version(time, meta), key)
+            df = self._df_dict[time]
+            with self.cache_lock:
+                rows = self.cache.get(k)
+                stats['hits' if rows is not None else 'misses'] += 1
+            if rows is None:
+                rows = compute(df)
+                with self.cache_lock:
+                    try:
+                        self.cache[k] = rows
+                    except ValueError:  # bigger than the whole cache
+                        pass
+        return df[rows]
+
+    def _bump_version(self, era, lineup):
+        if lineup:
+            self._lineup_version[era] += 1
+        self._meta_version[era] += 1
+        with self.cache_lock:
+            for k in list(self.cache.keys()):
+                if k[0] == 'search' and k[1] == era and k[2] != self.data_version(era, len(k[2]) == 2):
+                    self.cache.invalidate(k)
+
+    def cache_stats(self) -> pl.DataFrame:
+        """Hits, misses, evictions and invalidations of the query cache, per cached method."""
+        with self.cache_lock:
+            rows = []
+            for tag in ('ep_sub', 'cc', 'search'):
+                stats = self.cache.stats[tag]
+                hits, misses = stats['hits'], stats['misses']
+                entries = [v for k, v in self.cache.items() if k[0] == tag]
+                rows.append(
+                    {
+                        'METHOD': tag,
+                        'HITS': hits,
+                        'MISSES': misses,
+                        'HIT%': round(100 * hits / (hits + misses), 1) if hits + misses else None,
+                        'EVICTED': stats['evictions'],
+                        'INVALIDATED': stats['invalidations'],
+                        'ENTRIES': len(entries),
+                        'KB': sum(_estimated_size(v) for v in entries) // 1024,
+                    }
+                )
+            return pl.DataFrame(rows)
 
-    @cachedmethod(_CACHE_GETTER, key=partial(hashkey, 'slots'))
     def slot_table(self, time: str, by: Optional[str] = None):
-        q = self._df_dict[time]
+        """Slot counts (PG1-PG6 columns) per PG & flag, and per season if by='S'."""
+        self.ensure_loaded(time)
+        rollup = self._slot_rollup[time]
+        if by is None and 'S' in rollup.columns:
+            return rollup.lazy().group_by('PG', 'flag').agg(cs.matches(r'^PG\d$').sum())
+        return rollup.lazy()
+
+    # slot fact table: one row per playing, (PROD, S, slot, PG, flag). the per-season rollup of it is
+    # what every slot count reads, and an update only regroups the season(s) it touched.
+
+    @staticmethod
+    def _slot_facts_of(era, df: pl.DataFrame):
+        keys = ['PROD', 'S'] if 'S' in df.columns else ['PROD']
+        return pl.concat(
+            [
+                df.select(
+                    *keys,
+                    pl.lit(k, pl.UInt8).alias('slot'),
+                    pl.col(f'PG{k}_p').alias('PG'),
+                    pl.col(f'PG{k}_f').alias('flag'),
+                ).drop_nulls('PG')
+                for k in range(1, 4 if era == 'syndicated' else 7)
+            ]
+        )
 
-        vc_subset = [[f'PG{i}_p', f'PG{i}_f'] for i in range(1, 4 if time == 'syndicated' else 7)]
-        coalesce_exprs = [
-            pl.coalesce('PG', 'PG_right').alias('PG'),
-            pl.coalesce('flag', 'flag_right').alias('flag'),
-        ]
-        if by:
-            for vc in vc_subset:
-                vc.insert(0, by)
-            coalesce_exprs.insert(0, pl.coalesce(by, f'{by}_right').alias(by))
+    @staticmethod
+    def _slot_rollup_of(era, facts: pl.DataFrame):
+        return facts.group_by(*(['S'] if 'S' in facts.columns else []), 'PG', 'flag').agg(
+            (pl.col('slot') == k).sum().alias(f'PG{k}') for k in range(1, 4 if era == 'syndicated' else 7)
+        )
 
-        return (
-            reduce(
-                lambda g1, g2: g1.join(g2, on=[by, 'PG', 'flag'] if by else ['PG', 'flag'], how='outer').select(
-                    *coalesce_exprs, cs.matches(r'^PG\d$')
-                ),
-                (
-                    q.group_by(vc).count().rename({f'PG{i}_p': 'PG', f'PG{i}_f': 'flag', 'count': f'PG{i}'})
-                    for i, vc in enumerate(vc_subset, 1)
-                ),
+    def _build_slot_facts(self, era):
+        self._slot_facts[era] = self._slot_facts_of(era, self._df_dict[era])
+        self._slot_rollup[era] = self._slot_rollup_of(era, self._slot_facts[era])
+
+    # lineup bitmap index, in row order of the era's frame: per-slot PG ordinals (-1 if empty) and flags,
+    # plus a bitset of the PGs in each lineup. lineup search conditions become numpy masks off of it.
+    # with a vocab (the era's distinct playing strings, "Plinko (car)" and such, to their code in insertion order),
+    # also the per-slot playing codes, so free-text PG regexes only need to run over the vocab.
+
+    @staticmethod
+    def _lineup_arrays(era, df: pl.DataFrame, vocab: Optional[dict[str, int]] = None):
+        slots = range(1, 4 if era == 'syndicated' else 7)
+        ords = df.select(pl.col(f'PG{k}_p').to_physical().cast(pl.Int16).fill_null(-1) for k in slots).to_numpy()
+        flags = df.select(pl.col(f'PG{k}_f').fill_null(0) for k in slots).to_numpy()
+
+        members = np.zeros((df.height, _PG_WORDS), dtype=np.uint64)
+        r, k = np.nonzero(ords >= 0)
+        o = ords[r, k].astype(np.uint64)
+        np.bitwise_or.at(members, (r, (o // 64).astype(np.intp)), np.uint64(1) << (o % 64))
+
+        arrays = {'ords': ords, 'flags': flags, 'members': members}
+        if vocab is not None:
+            cells = df.select(pl.col(f'PG{k}') for k in slots)
+            for p in pl.concat(cells.get_columns()).drop_nulls().unique(maintain_order=True):
+                vocab.setdefault(p, len(vocab))
+            arrays['plays'] = cells.select(
+                pl.all().replace_strict(vocab, default=-1, return_dtype=pl.Int32).fill_null(-1)
+            ).to_numpy()
+        return arrays
+
+    def _build_lineup_index(self, era):
+        self._playing_vocab[era] = {}
+        self._lineup_index[era] = self._lineup_arrays(era, self._df_dict[era], self._playing_vocab[era])
+
+    def _update_lineup_index(self, era, old_row, row):
+        # copies rather than in-place writes, so a search running in another thread sees either version whole.
+        # the vocab only ever grows, so codes already handed out stay valid
+        i = row['PG_n'] - 1
+        new = self._lineup_arrays(era, pl.from_dict(row, schema=self._df_dict[era].schema), self._playing_vocab[era])
+        index = {}
+        for name, a in self._lineup_index[era].items():
+            if old_row:
+                a = a.copy()
+                a[i] = new[name][0]
+                index[name] = a
+            else:
+                index[name] = np.insert(a, i, new[name][0], axis=0)
+        self._lineup_index[era] = index
+
+    # row indexes: PROD --> row position, and the row positions sorted by AIRDATE (nulls left out)
+    # next to the sorted epoch days, so point lookups are a dict get and date ranges a binary search.
+
+    def _build_row_indexes(self, era):
+        df = self._df_dict[era]
+        self._prod_index[era] = {p: i for i, p in enumerate(df.get_column('PROD'))}
+        if 'AIRDATE' in df.columns:
+            by_date = (
+                df.select(pl.int_range(pl.len(), dtype=pl.UInt32).alias('i'), pl.col('AIRDATE').cast(pl.Int32).alias('d'))
+                .drop_nulls()
+                .sort('d', maintain_order=True)
+            )
+            self._date_index[era] = (by_date.get_column('i').to_numpy(), by_date.get_column('d').to_numpy())
+
+    def _update_row_indexes(self, era, old_row, row):
+        i = row['PG_n'] - 1
+        if not old_row and i == self._df_dict[era].height - 1:
+            self._prod_index[era] = self._prod_index[era] | {row['PROD']: i}
+            if 'AIRDATE' not in self._df_dict[era].columns or not row['AIRDATE']:
+                return
+        elif old_row and old_row.get('AIRDATE') == row.get('AIRDATE'):
+            return
+        # a retro insert shifts every position after it, and a new airdate moves in the sort, just redo it
+        self._build_row_indexes(era)
+
+    def prod_row(self, time: str, prod: str, *, named: bool = False):
+        """The row of get(time) with production number prod, None if there isn't one."""
+        self.ensure_loaded(time)
+        i = self._prod_index[time].get(prod)
+        return None if i is None else self._df_dict[time].row(i, named=named)
+
+    def prod_rows(self, time: str, prods: Iterable[str]) -> pl.DataFrame:
+        """The rows of get(time) with any of the production numbers prods, in frame order."""
+        self.ensure_loaded(time)
+        index = self._prod_index[time]
+        return self._df_dict[time][sorted({index[p] for p in prods if p in index})]
+
+    def prod_span_end(self, time: str, prod: str) -> bool:
+        """Whether prod can be an end of a prod_span over time: any well-formed code for daytime (which goes by
+        _PKEY), an existing one otherwise."""
+        self.ensure_loaded(time)
+        return bool(_DAY_PROD.fullmatch(prod)) if time == 'daytime' else prod in self._prod_index[time]
+
+    def prod_span(self, time: str, start: str, end: str) -> Optional[tuple[int, int]]:
+        """(offset, length) of the rows of get(time) from production number start to end inclusive, None if an end
+        isn't valid (see prod_span_end)."""
+        if not (self.prod_span_end(time, start) and self.prod_span_end(time, end)):
+            return None
+        if time == 'daytime':
+            keys = self._df_dict[time].get_column('_PKEY')
+            lo, hi = keys.search_sorted(prod_key(start), side='left'), keys.search_sorted(prod_key(end), side='right')
+        else:
+            index = self._prod_index[time]
+            lo, hi = index[start], index[end] + 1
+        return lo, max(hi - lo, 0)
+
+    def airdate_rows(self, time: str, dates: Optional[Iterable] = None, *, start=None, end=None) -> pl.DataFrame:
+        """The rows of get(time) that aired on any of dates, or else from start to end inclusive, in frame order."""
+        self.ensure_loaded(time)
+        perm, days = self._date_index[time]
+        if dates is not None:
+            d = np.unique([_epoch_day(dd) for dd in dates])
+            lo, hi = np.searchsorted(days, d, side='left'), np.searchsorted(days, d, side='right')
+            idx = np.concatenate([perm[l:h] for l, h in zip(lo, hi)] + [perm[:0]])
+        else:
+            idx = perm[
+                np.searchsorted(days, _epoch_day(start), side='left') : np.searchsorted(days, _epoch_day(end), side='right')
+            ]
+        return self._df_dict[time][np.sort(idx)]
+
+    # playing index: every playing as one int64 key with the PG ordinal in the high bits, sorted, so each PG's
+    # playings are a contiguous run in row order ('prod': ord | row) or in AIRDATE order ('date': ord | day | row,
+    # null airdates first, ties by row). flag codes ride along; the flag-filtered (and row-deduplicated) key arrays
+    # are made once per flag set and kept until the era changes. a last-played board is then binary searches.
+
+    _ROW_BITS = 24
+    _KEY_SHIFTS = {'prod': 32, 'date': 48}
+
+    @classmethod
+    def _playing_keys(cls, ords: np.ndarray, flags: np.ndarray, rows: np.ndarray, days: np.ndarray):
+        r, k = np.nonzero(ords >= 0)
+        o, row = ords[r, k].astype(np.int64), rows[r].astype(np.int64)
+        return {
+            'prod': (o << cls._KEY_SHIFTS['prod']) | row,
+            'date': (o << cls._KEY_SHIFTS['date']) | (days[r].astype(np.int64) << cls._ROW_BITS) | row,
+            'codes': flags[r, k],
+        }
+
+    @staticmethod
+    def _key_days(df: pl.DataFrame) -> np.ndarray:
+        if 'AIRDATE' not in df.columns:
+            return np.zeros(df.height, dtype=np.int64)
+        return df.select(pl.col('AIRDATE').cast(pl.Int64) + 1).to_series().fill_null(0).to_numpy()
+
+    def _build_playing_index(self, era):
+        df, li = self._df_dict[era], self._lineup_index[era]
+        keys = self._playing_keys(li['ords'], li['flags'], np.arange(df.height), self._key_days(df))
+        index = {}
+        for by in self._KEY_SHIFTS:
+            order = np.argsort(keys[by], kind='stable')
+            index[by], index[f'{by}_codes'] = keys[by][order], keys['codes'][order]
+        self._playing_index[era] = index
+
+    def _update_playing_index(self, era, old_row, row):
+        i = row['PG_n'] - 1
+        if not old_row and i != self._df_dict[era].height - 1:
+            # a retro insert shifts every position after it
+            self._build_playing_index(era)
+            return
+
+        schema = self._df_dict[era].schema
+
+        def keys_of(r):
+            r_df = pl.from_dict(r, schema=schema)
+            a = self._lineup_arrays(era, r_df)
+            return self._playing_keys(a['ords'], a['flags'], np.array([r['PG_n'] - 1]), self._key_days(r_df))
+
+        # copies, like the lineup index; the flag-filtered arrays are dropped and redone on demand
+        index, new = {}, keys_of(row)
+        for by in self._KEY_SHIFTS:
+            keys, codes = self._playing_index[era][by], self._playing_index[era][f'{by}_codes']
+            if old_row:
+                keep = ~np.isin(keys, keys_of(old_row)[by])
+                keys, codes = keys[keep], codes[keep]
+            order = np.argsort(new[by], kind='stable')
+            at = np.searchsorted(keys, new[by][order], side='right')
+            index[by], index[f'{by}_codes'] = np.insert(keys, at, new[by][order]), np.insert(codes, at, new['codes'][order])
+        self._playing_index[era] = index
+
+    def _playing_keys_for(self, time: str, by: str, flags: Optional[frozenset[int]]) -> np.ndarray:
+        index = self._playing_index[time]
+        if (k := index.get((by, flags))) is None:
+            keys = index[by][_flag_codes_match(index[f'{by}_codes'], flags)]
+            # a PG twice in one lineup is still one lineup
+            k = index[(by, flags)] = keys[np.r_[True, keys[1:] != keys[:-1]]] if keys.size else keys
+        return k
+
+    def last_played_rows(
+        self,
+        time: str,
+        pgs: Iterable[PG],
+        nth: int = 1,
+        flags: Optional[frozenset[int]] = None,
+        as_of: Optional[int] = None,
+        by: str = 'prod',
+        cols: Sequence[str] = ('PROD', 'AIRDATE'),
+    ) -> dict:
+        """{pg: cols of its nth to last lineup (with pg played with any of flags), capped at its first} over get(time)
+        up to row as_of, in row ('prod') or AIRDATE ('date') order. PGs with no such lineup are left out."""
+        self.ensure_loaded(time)
+        # positions are only good for the frame they came from, a retro insert shifts them: take both under the
+        # lock update writes under
+        with self._era_locks[time]:
+            df = self._df_dict[time]
+            keys = self._playing_keys_for(time, by, flags or None)
+        shift, row_mask = self._KEY_SHIFTS[by], (1 << self._ROW_BITS) - 1
+        if as_of is not None and by == 'date':
+            # airdate order isn't row order, so this one is a pass over the playings instead of a search
+            keys = keys[(keys & row_mask) <= as_of]
+
+        pgs = list(pgs)
+        o = np.array([PG_ORDINAL[pg] for pg in pgs], dtype=np.int64)
+        lo = np.searchsorted(keys, o << shift)
+        hi = np.searchsorted(keys, (o << shift) | (as_of + 1) if as_of is not None and by == 'prod' else (o + 1) << shift)
+        found = (hi > lo) & (nth > 0)
+        rows = keys[np.maximum(lo, hi - nth)[found]] & row_mask
+        return dict(zip(itertools.compress(pgs, found), df[rows].select(cols).rows()))
+
+    def lineup_mask(
+        self,
+        time: str,
+        pg_query: Union[Collection[PG], str],
+        slots: Collection[int],
+        flags: Optional[Collection[int]],
+        freqs: Optional[Collection[int]],
+    ) -> pl.Series:
+        """Boolean Series over get(time), the same values as build_lineup_expr(...), nulls included: without freqs, a
+        lineup with no match but an empty queried slot (4-6 of a half hour show) is null, not False."""
+        self.ensure_loaded(time)
+        index = self._lineup_index[time]
+        cols = [s - 1 for s in sorted(slots) if s <= index['ords'].shape[1]]
+
+        if type(pg_query) is str:
+            # regex against each distinct playing string once, rows pick the result up by code (-1 --> the False on the end).
+            # codes before vocab, which only grows
+            plays = index['plays'][:, cols]
+            found = pl.Series(list(self._playing_vocab[time]), dtype=pl.String).str.contains(f'(?i){pg_query}')
+            hits = np.append(found.fill_null(False).to_numpy(), False)[plays]
+        elif not flags and not freqs and len(cols) == index['ords'].shape[1]:
+            hits = None
+        else:
+            hits = np.isin(index['ords'][:, cols], [PG_ORDINAL[pg] for pg in pg_query])
+
+        if flags:
+            hits &= _flag_codes_match(index['flags'][:, cols], frozenset(flags))
+        if freqs:
+            # the old sum_horizontal skipped the nulls, so no nulls here either
+            return pl.Series(np.isin(hits.sum(axis=1), list(freqs)))
+
+        found = (index['members'] & _pg_bitset(pg_query)).any(axis=1) if hits is None else hits.any(axis=1)
+        # any_horizontal over the per-slot conditions: an empty slot's is null, which only shows if nothing matched
+        unknown = ~found & (index['ords'][:, cols] < 0).any(axis=1)
+        return pl.Series(found).scatter(np.flatnonzero(unknown), None)
+
+    def _update_slot_facts(self, era, old_row, row):
+        facts = self._slot_facts[era]
+        if old_row:
+            facts = facts.filter(pl.col('PROD') != old_row['PROD'])
+        facts = pl.concat([facts, self._slot_facts_of(era, pl.from_dict(row, schema=self._df_dict[era].schema))])
+        self._slot_facts[era] = facts
+
+        if 'S' not in facts.columns:
+            self._slot_rollup[era] = self._slot_rollup_of(era, facts)
+        else:
+            seasons = list({r['S'] for r in (old_row, row) if r})
+            self._slot_rollup[era] = pl.concat(
+                [
+                    self._slot_rollup[era].filter(~pl.col('S').is_in(seasons)),
+                    self._slot_rollup_of(era, facts.filter(pl.col('S').is_in(seasons))),
+                ]
             )
-            .with_columns(cs.matches(r'^PG\d$').fill_null(0))
-            .lazy()
+
+    # co-occurrence tensors. per era, with S indexed by the era's seasons present (just one for primetime):
+    #   slot[S, k, i, j] = lineups in season S with PG i in slot k that also have PG j
+    #   flag[S, f, i, j] = lineups in season S with PG i played with flag value codes[f] that also have PG j
+    # (i, i) is then just the playings of i. Summing over k or f gives the plain PG x PG counts.
+    # Only the first playing of a PG in a lineup goes in, so a PG that plays more than once in a lineup (the
+    # all-Plinko show) is there in just one slot and with one flag. repeats[S, i] counts those lineups, and the
+    # slot- or flag-aware counts of a PG that repeats in range have to come from concurrence_query instead.
+
+    def _cooc_indices(self, era, df: pl.DataFrame, codes: np.ndarray, season_labels: np.ndarray):
+        n_slots = 3 if era == 'syndicated' else 6
+        n_pg = len(PG_ORDINAL)
+
+        ords = (
+            df.select(pl.col(f'PG{k}_p').to_physical().cast(pl.Int32).fill_null(-1) for k in range(1, n_slots + 1))
+            .to_numpy()
+            .reshape(-1, n_slots)
+        )
+        fcodes = np.searchsorted(
+            codes,
+            df.select(pl.col(f'PG{k}_f').fill_null(0) for k in range(1, n_slots + 1)).to_numpy().reshape(-1, n_slots),
         )
+        seasons = (
+            np.searchsorted(season_labels, df.get_column('S').to_numpy()) if 'S' in df.columns else np.zeros(df.height, int)
+        )
+
+        # how many times the PG in each slot already played earlier in the lineup
+        earlier = np.zeros_like(ords)
+        for k in range(1, n_slots):
+            earlier[:, k] = (ords[:, :k] == ords[:, k : k + 1]).sum(axis=1)
+        first = (ords >= 0) & (earlier == 0)
+        repeat_idx = (seasons[:, None] * n_pg + ords)[(ords >= 0) & (earlier == 1)]
+
+        slot_idx, flag_idx = [], []
+        for k in range(n_slots):
+            for l in range(n_slots):
+                m = first[:, k] & first[:, l]
+                pair = ords[m, k] * n_pg + ords[m, l]
+                slot_idx.append((seasons[m] * n_slots + k) * n_pg * n_pg + pair)
+                flag_idx.append((seasons[m] * len(codes) + fcodes[m, k]) * n_pg * n_pg + pair)
+
+        return np.concatenate(slot_idx), np.concatenate(flag_idx), repeat_idx
+
+    @staticmethod
+    def _season_counts(idx: np.ndarray, n_seasons: int, shape: tuple[int, ...]) -> np.ndarray:
+        # one season's bincount at a time, straight into the uint16 tensor. a single bincount over every season
+        # would have an int64 intermediate 4x the size of the result
+        size = int(np.prod(shape))
+        idx = np.sort(idx)
+        bounds = np.searchsorted(idx, np.arange(n_seasons + 1) * size)
+        out = np.empty((n_seasons, *shape), dtype=np.uint16)
+        for s in range(n_seasons):
+            out[s] = np.bincount(idx[bounds[s] : bounds[s + 1]] - s * size, minlength=size).reshape(shape)
+        return out
+
+    def _build_cooccurrence(self, era):
+        df = self._df_dict[era]
+        n_slots = 3 if era == 'syndicated' else 6
+        n_pg = len(PG_ORDINAL)
+        codes = np.unique(df.select(cs.ends_with('_f').fill_null(0)).to_numpy())
+        season_labels = df.get_column('S').unique().sort().to_numpy() if 'S' in df.columns else np.zeros(1, int)
+        n_seasons = len(season_labels)
+
+        slot_idx, flag_idx, repeat_idx = self._cooc_indices(era, df, codes, season_labels)
+        self._cooc[era] = {
+            'codes': codes,
+            'seasons': season_labels,
+            'slot': self._season_counts(slot_idx, n_seasons, (n_slots, n_pg, n_pg)),
+            'flag': self._season_counts(flag_idx, n_seasons, (len(codes), n_pg, n_pg)),
+            'repeats': np.bincount(repeat_idx, minlength=n_seasons * n_pg).reshape(n_seasons, n_pg),
+        }
+
+    def _update_cooccurrence(self, era, old_row, row):
+        t = self._cooc[era]
+        schema = self._df_dict[era].schema
+        df_row = pl.from_dict(row, schema=schema)
+
+        if not (
+            np.isin(df_row.select(cs.ends_with('_f').fill_null(0)).to_numpy(), t['codes']).all()
+            and ('S' not in row or row['S'] in t['seasons'])
+        ):
+            # first time seeing this flag combo (or season), the axes need to grow
+            self._build_cooccurrence(era)
+            return
+
+        for r, ufunc in ((old_row, np.subtract), (row, np.add)):
+            if r:
+                slot_idx, flag_idx, repeat_idx = self._cooc_indices(
+                    era, pl.from_dict(r, schema=schema), t['codes'], t['seasons']
+                )
+                ufunc.at(t['slot'].reshape(-1), slot_idx, 1)
+                ufunc.at(t['flag'].reshape(-1), flag_idx, 1)
+                ufunc.at(t['repeats'].reshape(-1), repeat_idx, 1)
+
+    def _cooc_seasons(self, endpoints: Optional[Portion], time: str):
+        if not endpoints or time == 'primetime':
+            return slice(None)
+        elif type(endpoints.lower) is not int:
+            raise ValueError('Co-occurrence counts do not support date start/end at this time.')
+        else:
+            return [i for i, s in enumerate(self._cooc[time]['seasons']) if s in endpoints]
+
+    def _repeats(self, endpoints: Optional[Portion], time: str, pg: PG) -> bool:
+        # whether pg plays more than once in some lineup in range, see above
+        self.ensure_loaded(time)
+        return bool(self._cooc[time]['repeats'][self._cooc_seasons(endpoints, time), PG_ORDINAL[pg]].any())
 
-    def save_excel(self, fn='Price_is_Right_Frequency.xlsx'):
-        self.save_func(self.write_excel(), fn)
+    def pair_counts(self, endpoints: Optional[Portion], time: str, pgs: Sequence[PG]) -> np.ndarray:
+        """[i, j] = number of lineups with both pgs[i] and pgs[j]."""
+        self.ensure_loaded(time)
+        o = [PG_ORDINAL[pg] for pg in pgs]
+        return self._cooc[time]['slot'][:, :, o][..., o][self._cooc_seasons(endpoints, time)].sum(axis=(0, 1))
+
+    def partner_counts(
+        self,
+        endpoints: Optional[Portion],
+        time: str,
+        pg: PG,
+        flags: Optional[frozenset[int]] = None,
+        slots: Optional[Collection[int]] = None,
+    ) -> np.ndarray:
+        """Indexed by PG ordinal, the number of lineups with pg (played in one of slots, with any of flags) that also have
+        that PG. Entry pg itself is the total number of such lineups."""
+        self.ensure_loaded(time)
+        t = self._cooc[time]
+        seasons = self._cooc_seasons(endpoints, time)
+        o = PG_ORDINAL[pg]
+
+        if flags and slots:
+            raise ValueError('Co-occurrence counts are either slot-aware or flag-aware, not both.')
+        elif (flags or slots) and self._repeats(endpoints, time, pg):
+            raise ValueError(f'{pg} plays more than once in a lineup here, co-occurrence counts cannot be slot/flag-aware.')
+        elif flags:
+            return t['flag'][:, _flag_codes_match(t['codes'], flags), o][seasons].sum(axis=(0, 1))
+        else:
+            return t['slot'][:, [s - 1 for s in slots] if slots else slice(None), o][seasons].sum(axis=(0, 1))
+
+    def concurrence_count(
+        self,
+        endpoints: Optional[Portion],
+        time: str,
+        pgQueries: Tuple[PG],
+        pgFlags: tuple[Optional[frozenset[int]]],
+    ) -> Optional[int]:
+        """Same count as concurrence_query(...).height, straight from the tensors. None if this query isn't a pair
+        (or single) with at most one flagged PG, is over dates, or flags a PG that plays more than once in a lineup in
+        range; the caller should fall back to concurrence_query."""
+        if len(pgQueries) > 2 or sum(bool(f) for f in pgFlags) > 1 or (endpoints and type(endpoints.lower) is not int):
+            return None
+
+        base, other = (0, -1) if pgFlags[0] or not pgFlags[-1] else (-1, 0)
+        if pgFlags[base] and self._repeats(endpoints, time, pgQueries[base]):
+            return None
+        return int(self.partner_counts(endpoints, time, pgQueries[base], pgFlags[base])[PG_ORDINAL[pgQueries[other]]])
+
+    def partner_table(
+        self,
+        endpoints: Optional[Portion],
+        time: str,
+        pgQueries: Tuple[PG],
+        pgFlags: tuple[Optional[frozenset[int]]],
+        chunk: int = 0,
+    ) -> pl.DataFrame:
+        """Every PG in the lineups of concurrence_query(...), with how many of them it's in (PG, count), most first.
+        The queried PGs are in all of them, so their count is the total. With chunk, the same per group of chunk
+        seasons of endpoints (S is the group's first season)."""
+        by_date = endpoints and type(endpoints.lower) is not int
+        seasons = list(P.iterate(endpoints, step=1)) if chunk and endpoints and not by_date else []
+        groups = [(s, endpoints & P.closed(s, s + chunk - 1)) for s in seasons[::chunk]] if seasons else [(None, endpoints)]
+        keys = ['S'] if seasons else []
+
+        if len(pgQueries) == 1 and not by_date and not (pgFlags[0] and self._repeats(endpoints, time, pgQueries[0])):
+            # one PG: each group is a row of the co-occurrence tensor
+            q = pl.concat(
+                [
+                    pl.DataFrame(
+                        {
+                            'PG': [pg.sheetName for pg in PG],
+                            'count': self.partner_counts(ep, time, pgQueries[0], pgFlags[0]),
+                        },
+                        schema={'PG': pl.String, 'count': pl.UInt32},
+                    ).with_columns(pl.lit(s, dtype=pl.Int32).alias('S'))
+                    for s, ep in groups
+                ]
+            ).lazy()
+        else:
+            q = self.concurrence_query(endpoints, time, pgQueries, pgFlags)
+            if seasons:
+                q = q.with_columns(((pl.col('S').cast(pl.Int32) - seasons[0]) // chunk * chunk + seasons[0]).alias('S'))
+            q = (
+                q.with_columns(pl.int_range(pl.len()).alias('_row'))
+                .unpivot(cs.matches(r'^PG\d_p$'), index=[*keys, '_row'], value_name='PG')
+                .drop_nulls('PG')
+                .unique(['_row', 'PG'])
+                .group_by(*keys, pl.col('PG').cast(pl.String))
+                .agg(pl.len().alias('count'))
+            )
+
+        return (
+            q.filter(pl.col('count') > 0)
+            .select(*keys, 'PG', 'count')
+            .sort(*keys, 'count', 'PG', descending=[False] * len(keys) + [True, False])
+            .collect()
+        )
+
+    def save_excel(self, fn=EXCEL_FN):
+        self.excel_stale = False
+        try:
+            self.save_func(self.write_excel(), fn)
+        except:
+            self.excel_stale = True
+            raise
+
+    # persistence. edits only mark the sheet dirty and (re)start a timer, so a burst of retro edits
+    # coalesces into one upload of the binary store, off the event loop. the timer isn't a daemon, so exiting
+    # still waits on a pending save; close writes it out right away (on shutdown, and atexit as a last resort).
+    def _mark_dirty(self, retry=False):
+        with self._save_lock:
+            self.dirty = self.excel_stale = True
+            if self._save_timer:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if self._closed:
+                return
+            self._save_timer = threading.Timer(self._SAVE_DELAY, self.flush)
+            # retrying a failed upload mustn't keep a dying process up forever though
+            self._save_timer.daemon = retry
+            self._save_timer.start()
+
+    def close(self):
+        """Upload any unsaved edits now and stop scheduling saves."""
+        with self._save_lock:
+            self._closed = True
+        atexit.unregister(self.close)
+        return self.flush()
+
+    def flush(self):
+        """Upload the binary store now if there are unsaved edits. Returns whether anything was written."""
+        with self._save_lock:
+            if self._save_timer:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not self.dirty:
+                return False
+            # the store is rewritten whole, so eras nobody has touched yet have to be read in first.
+            # frames are never mutated in place, a shallow copy is a consistent snapshot.
+            # one at a time, this can be running at interpreter exit, where no new pool can start
+            for era in ERAS:
+                self.ensure_loaded(era)
+            frames = OrderedDict((era, self._df_dict[era]) for era in ERAS)
+            self.dirty = False
+
+        try:
+            self.save_func(_write_frames(frames), STORE_FN)
+            _log.info(f'saved cs store at {datetime.now()}')
+            return True
+        except Exception as e:
+            retry = 'unsaved edits are lost' if self._closed else f'retrying in {self._SAVE_DELAY}s'
+            _log.error(f'failed to save cs store, {retry}: {e}')
+            self._mark_dirty(retry=True)
+            return False
 
     def write_excel(self):
         # coud factor these static methods & variables out, but ultimately a minor concern
@@ -468,7 +1355,8 @@ class ConflictSheet:
         excel_fp = io.BytesIO()
 
         with xlsxwriter.Workbook(excel_fp) as wb:
-            for era in self._df_dict.keys():
+            self.load()
+            for era in ERAS:
                 df_out = (
                     self._df_dict[era]
                     .lazy()
@@ -507,7 +1395,7 @@ class ConflictSheet:
                         'SPECIAL' if era == 'primetime' else 'NOTES': 274,
                         cs.starts_with('PG'): 149,
                         # for some reason the selector above is not capturing this as of 1.9.0. override
-                        '_PROD': 0,
+                        '_PKEY': 0,
                     },
                     freeze_panes='A2',
                     autofilter=False,
@@ -545,6 +1433,10 @@ class ConflictSheet:
 
     def update(self, prodNumber, pgps, append, airdate, intended_date, notes):
         era = 'primetime' if prodNumber.endswith('SP') else 'daytime'
+        self.ensure_loaded(era)
+        old_row = None if append else self.prod_row(era, prodNumber, named=True)
+        if not append and old_row is None:
+            raise ValueError(f'{prodNumber} does not exist in {era}.')
         row = (
             {
                 'PROD': prodNumber,
@@ -553,7 +1445,7 @@ class ConflictSheet:
                 'NOTES' if era == 'daytime' else 'SPECIAL': notes,
             }
             if append
-            else self._df_dict[era].row(by_predicate=pl.col('PROD') == prodNumber, named=True)
+            else copy(old_row)
         )
         if era == 'daytime' and append:
             row['S'] = CURRENT_SEASON
@@ -571,113 +1463,183 @@ class ConflictSheet:
                 row['INT. DATE'] = intended_date
             if not pgps:  # allow None -> null
                 row['NOTES' if era == 'daytime' else 'SPECIAL'] = notes
-        else:
-            row['PG_n'] = 99999  # filler
 
         if era == 'daytime':
-            row['_PROD'] = row['PROD'][-1] + row['PROD'][:-1]
-
-        df_row = pl.from_dict(row, schema=self._df_dict[era].schema)
-
-        if era == 'primetime':
-            if append:
-                self._df_dict[era].extend(df_row.select(self._df_dict[era].columns))
-            else:
-                self._df_dict[era] = (
-                    self._df_dict[era]
-                    .filter(pl.col('PROD') != prodNumber)
-                    .extend(df_row.select(self._df_dict[era].columns))
-                    .sort('PG_n')
-                )
+            row['_PKEY'] = prod_key(row['PROD'])
+
+        # searches read the frame & its indexes under the era lock (see search_lineups), so they see all of this or none
+        with self._era_locks[era]:
+            shifted = self._write_row(era, row, old_row)
+            self._invalidate_caches(era, [r for r in (old_row, row) if r], shifted)
+            self._update_cooccurrence(era, old_row, row)
+            self._update_slot_facts(era, old_row, row)
+            self._update_lineup_index(era, old_row, row)
+            self._update_row_indexes(era, old_row, row)
+            self._update_playing_index(era, old_row, row)
+            self._bump_version(era, not old_row or any(old_row[c] != row[c] for c in old_row if re.match(r'^PG\d', c)))
+        self._mark_dirty()
+
+    def _write_row(self, era, row, old_row):
+        """Splice one row into an era's frame without rebuilding it. Returns the rows whose PG_n got shifted, if any."""
+        df = self._df_dict[era]
+
+        if old_row:
+            idx = old_row['PG_n'] - 1
+            row['PG_n'] = old_row['PG_n']
+            head, tail = df.slice(0, idx), df.slice(idx + 1)
         else:
-            self._df_dict[era] = (
-                self._df_dict[era]
-                .drop('PG_n')
-                .filter(pl.col('PROD') != prodNumber)
-                .merge_sorted(df_row.drop('PG_n'), '_PROD')
-                .with_row_index('PG_n', 1)
-            )
+            # daytime is kept in _PKEY order (binary search, so only a true retro add pays for the PG_n shift),
+            # primetime in PG_n order, where new specials always go last.
+            idx = df.get_column('_PKEY').search_sorted(row['_PKEY'], side='right') if era == 'daytime' else df.height
+            row['PG_n'] = idx + 1
+            head, tail = df.slice(0, idx), df.slice(idx).with_columns(pl.col('PG_n') + 1)
+
+        df = pl.concat([head, pl.from_dict(row, schema=df.schema), tail], rechunk=False)
+        # many small edits leave many small chunks behind, consolidate every so often
+        self._df_dict[era] = df.rechunk() if df.n_chunks() > self._MAX_CHUNKS else df
+
+        return None if old_row else tail
+
+    def _invalidate_caches(self, era, rows, shifted=None):
+        """Drop only the cached queries over era whose season/date range touches the edited row(s),
+        or any row whose PG_n was shifted by an insertion."""
+        seasons = {r['S'] for r in rows if r.get('S') is not None}
+        dates = {datetime.combine(r['AIRDATE'], datetime.min.time()) for r in rows if r.get('AIRDATE')}
+        shifted_from = None
+        if shifted is not None and shifted.height:
+            if 'S' in shifted.columns:
+                seasons |= set(range(shifted.get_column('S').min(), CURRENT_SEASON + 1))
+            if first_date := shifted.get_column('AIRDATE').min():
+                shifted_from = datetime.combine(first_date, datetime.min.time())
+
+        def affected(endpoints):
+            if not endpoints:
+                return True
+            elif type(endpoints.lower) is int:
+                return era == 'primetime' or any(s in endpoints for s in seasons)
+            else:
+                return any(d in endpoints for d in dates) or bool(shifted_from and endpoints.upper >= shifted_from)
 
-        self._reset_caches()
+        with self.cache_lock:
+            self._edits[era] += 1
+            for k in list(self.cache.keys()):
+                tag, *args = k
+                if tag != 'search' and args[1] == era and affected(args[0]):
+                    self.cache.invalidate(k)
 
     def _reset_caches(self):
-        self.endpoint_sub.cache_clear(self)
-        self.concurrence_query.cache_clear(self)
-        self.slot_table.cache_clear(self)
-
-    def initialize(self, fn='Price_is_Right_Frequency.xlsx'):
-        self._df_dict.clear()
-        self._reset_caches()
-
-        excel_fp = self.load_func(fn)
-
-        for era in ('daytime', 'primetime', 'syndicated', 'unaired'):
-            q = pl.read_excel(
-                excel_fp,
-                sheet_name=era.title(),
-                # to do: update to calamine / fastexcel
-                engine='xlsx2csv',
-                engine_options={'ignore_formats': 'float'},
-                read_options={
-                    'row_index_name': 'PG_n',
-                    'row_index_offset': 1,
-                    'null_values': '-',
-                },
-            ).lazy()
-
-            wc = [cs.ends_with('_f').cast(pl.UInt16)]
-            if era != 'primetime':
-                wc.append(pl.col('S').cast(pl.UInt8))
-            if era != 'syndicated':
-                # for some reason some dates are reformatting when going through read_excel, I just take care of it here.
-                wc.extend(
-                    [
-                        pl.when(cs.ends_with('DATE').str.contains('/'))
-                        .then(cs.ends_with('DATE').str.strptime(pl.Date, '%m/%d/%Y', strict=False))
-                        .otherwise(cs.ends_with('DATE').str.strptime(pl.Date, '%m-%d-%y', strict=False))
-                    ]
-                )
-
-            q = q.with_columns(wc).collect()
+        with self.cache_lock:
+            self.cache.clear()
+            # searches still running over the old data can't file their results under a live version
+            for era in ERAS:
+                self._lineup_version[era] += 1
+                self._meta_version[era] += 1
+                self._edits[era] += 1
+
+    def initialize(self, from_excel=False):
+        """Point at the binary store, or at the workbook if asked to (or there is no store yet), in which case
+        the store is rewritten from it. Eras are only read in as they're first needed, see ensure_loaded/load."""
+        self.flush()
+        with ExitStack() as stack:
+            for lock in self._era_locks.values():
+                stack.enter_context(lock)
+            self._df_dict.clear()
+            self._loaded.clear()
+            self._reset_caches()
+
+            if not from_excel:
+                try:
+                    self._source = self._zip_source(self.load_func(STORE_FN).getvalue())
+                    _log.info('opened cs store')
+                except Exception as e:
+                    _log.warning(f'could not open cs store, falling back to {EXCEL_FN}: {e}')
+                    from_excel = True
+
+            if from_excel:
+                self._load_excel(EXCEL_FN)
+
+        if from_excel:
+            self.dirty = True
+            self.flush()
+
+    @staticmethod
+    def _zip_source(buf: bytes):
+        # read the member list up front so a broken or incomplete bundle fails here, not on some later command
+        with zipfile.ZipFile(io.BytesIO(buf)) as zf:
+            missing = set(ERAS).difference(n.removesuffix('.arrow') for n in zf.namelist())
+        if missing:
+            raise KeyError(f'no {", ".join(sorted(missing))} in bundle')
+        return lambda era: _read_frames(io.BytesIO(buf), [era])[era]
+
+    def _load_excel(self, fn):
+        # only reached on a reload from the workbook (or when there is no store yet), and the store gets rewritten
+        # from what this parses, so every era is needed right away. parse them side by side
+        excel_buf = self.load_func(fn).getvalue()
+        with ThreadPoolExecutor(len(ERAS)) as ex:
+            frames = dict(zip(ERAS, ex.map(lambda era: self._parse_era(io.BytesIO(excel_buf), era), ERAS)))
+        self._source = frames.__getitem__
+
+    @staticmethod
+    def _parse_era(excel_fp, era):
+        q = pl.read_excel(
+            excel_fp,
+            sheet_name=era.title(),
+            # to do: update to calamine / fastexcel
+            engine='xlsx2csv',
+            engine_options={'ignore_formats': 'float'},
+            read_options={
+                'row_index_name': 'PG_n',
+                'row_index_offset': 1,
+                'null_values': '-',
+            },
+        ).lazy()
+
+        wc = [cs.ends_with('_f').cast(pl.UInt16)]
+        if era != 'primetime':
+            wc.append(pl.col('S').cast(pl.UInt8))
+        if era != 'syndicated':
+            # for some reason some dates are reformatting when going through read_excel, I just take care of it here.
+            wc.extend(
+                [
+                    pl.when(cs.ends_with('DATE').str.contains('/'))
+                    .then(cs.ends_with('DATE').str.strptime(pl.Date, '%m/%d/%Y', strict=False))
+                    .otherwise(cs.ends_with('DATE').str.strptime(pl.Date, '%m-%d-%y', strict=False))
+                ]
+            )
 
-            q = (
-                q.lazy()
-                .with_columns(
-                    pl.when(pl.col(f'PG{d}_f') > 0)
-                    .then(
-                        pl.format(
-                            '{} ({})',
-                            pl.col(f'PG{d}'),
-                            pl.col(f'PG{d}_f').cast(pl.String).replace(FLAG_STRS),
-                        )
+        q = q.with_columns(wc).collect()
+
+        q = (
+            q.lazy()
+            .with_columns(
+                pl.when(pl.col(f'PG{d}_f') > 0)
+                .then(
+                    pl.format(
+                        '{} ({})',
+                        pl.col(f'PG{d}'),
+                        pl.col(f'PG{d}_f').cast(pl.String).replace(FLAG_STRS),
                     )
-                    .otherwise(pl.col(f'PG{d}'))
-                    for d in range(1, 4 if era == 'syndicated' else 7)
-                )
-                .with_columns(
-                    pl.when((pl.col(f'PG{d}').str.ends_with('car)')) & (pl.col(f'PG{d}_p').is_in(PG.CAR_BOATABLE_STRS)))
-                    .then(pl.col(f'PG{d}').str.replace('car)', 'boat)', literal=True))
-                    .otherwise(pl.col(f'PG{d}'))
-                    for d in range(1, 4 if era == 'syndicated' else 7)
                 )
+                .otherwise(pl.col(f'PG{d}'))
+                for d in range(1, 4 if era == 'syndicated' else 7)
             )
+            .with_columns(
+                pl.when((pl.col(f'PG{d}').str.ends_with('car)')) & (pl.col(f'PG{d}_p').is_in(PG.CAR_BOATABLE_STRS)))
+                .then(pl.col(f'PG{d}').str.replace('car)', 'boat)', literal=True))
+                .otherwise(pl.col(f'PG{d}'))
+                for d in range(1, 4 if era == 'syndicated' else 7)
+            )
+        )
 
-            if era == 'daytime':
-                q = q.with_columns(
-                    pl.col('PROD')
-                    .str.replace_all(r'^(\w{4})(\w)$', '$2$1')
-                    .str.replace('R', 'D')
-                    .str.replace('XX', '11')
-                    .alias('_PROD')
-                )
+        if era == 'daytime':
+            # workbooks written before _PKEY carry the old string key
+            q = q.drop('_PROD', strict=False).with_columns(_prod_key_expr().alias('_PKEY'))
 
-            # 2025-03-07 update
-            # Categorical with all the flag combos was getting finicky depending on polars version
-            # and if a new flag combo is coming in or not, which is also column-dependent (new slotting)
-            # let's scrap it, can actually now pl.Enum raw PG safely
-            self._df_dict[era] = q.with_columns(
-                (cs.matches(r'^PG\d_p$')).cast(pl.Enum([pg.sheetName for pg in PG]))
-            ).collect()
+        # 2025-03-07 update
+        # Categorical with all the flag combos was getting finicky depending on polars version
+        # and if a new flag combo is coming in or not, which is also column-dependent (new slotting)
+        # let's scrap it, can actually now pl.Enum raw PG safely
+        return q.with_columns((cs.matches(r'^PG\d_p$')).cast(pl.Enum([pg.sheetName for pg in PG]))).collect()
 
 
 if __name__ == '__main__':
@@ -685,13 +1647,12 @@ if __name__ == '__main__':
     from dropboxwayo import dropboxwayo
 
     con = ConflictSheet(
-        lambda fn: io.BytesIO(dropboxwayo.download('/heroku/wayo-py/Price_is_Right_Frequency.xlsx')),
-        lambda iob, fn: dropboxwayo.upload(iob.getvalue(), '/heroku/wayo-py/Price_is_Right_Frequency.xlsx'),
+        lambda fn: io.BytesIO(dropboxwayo.download('/heroku/wayo-py/' + fn)),
+        lambda iob, fn: dropboxwayo.upload(iob.getvalue(), '/heroku/wayo-py/' + fn),
     )
 
-    con.initialize()
     df_out = (
-        con._df_dict['daytime']
+        con.get('daytime')
         # .lazy()
         .drop('PG_n').with_columns(
             pl.when(pl.col(f'PG{slot}_f') > 0)
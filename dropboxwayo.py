@@ -3,7 +3,7 @@ from contextlib import closing
 from datetime import datetime
 
 import dropbox
-from dropbox.files import WriteMode
+from dropbox.files import FileMetadata, WriteMode
 
 from secretswayo import DROPBOX_TOKEN
 
@@ -27,6 +27,15 @@ class DropboxWayo:
         with closing(res) as r:
             return r.text if path.endswith('.txt') or path.endswith('.html') else r.content
 
+    def content_hashes(self, folder):
+        """{file name: Dropbox content hash} of every file directly in folder, one listing call per page of results."""
+        res = self.dbx.files_list_folder(folder)
+        entries = list(res.entries)
+        while res.has_more:
+            res = self.dbx.files_list_folder_continue(res.cursor)
+            entries.extend(res.entries)
+        return {e.name: e.content_hash for e in entries if isinstance(e, FileMetadata)}
+
     def update_str(self, sf, path, append, notify=True):
         a = self.download(path)
         assert not a or (type(a) is str and type(sf) is str)
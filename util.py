@@ -1,3 +1,4 @@
+import asyncio
 import colorsys
 import io
 import itertools
@@ -5,13 +6,16 @@ import operator
 import random
 import re
 import string
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, datetime
-from functools import reduce
-from sys import getsizeof
+from functools import partial, reduce
 from typing import *
 
 import discord
 import numpy as np
+import polars as pl
 import portion as P
 from cachetools.func import lfu_cache
 from discord.ext import commands
@@ -26,7 +30,6 @@ SCHEDULER_TZ = timezone('US/Eastern')
 PLAYING_FLAGS = tuple(reversed(('car', 'T', 'cars', '*', '@', 'R', '$', '^', '?', 'MDG')))
 NAME_ATTRGET = operator.attrgetter('name')
 MAX_MES_SIZE = 2000
-SORT_PROD = lambda p: p[-1] + p[:-1]  # xxxx[DK] --> [DK]xxxx
 
 NONNEGATIVE_INT = commands.Range[int, 0]
 POSITIVE_INT = commands.Range[int, 1]
@@ -252,6 +255,19 @@ def add_separator_lines(ss: str, vertical_col: str, horizontal: bool):
     return '\n'.join(sss)
 
 
+def _write_parts(fp, parts, n_chars=None):
+    # n_chars: stop once at least that many characters are written
+    written = 0
+    for p in parts:
+        if n_chars is not None and written >= n_chars:
+            break
+        if isinstance(p, str):
+            fp.write(p.encode())
+        else:
+            p.write(fp, None if n_chars is None else (n_chars - written) // (p.line_width + 1) + 1)
+        written += len(p)
+
+
 @lfu_cache
 def _command_to_fn(command):
     commands = [command]
@@ -261,12 +277,25 @@ def _command_to_fn(command):
 
 
 async def send_long_mes(ctx, s, *, fn=None, newline_limit=19):
-    if len(s) < MAX_MES_SIZE - 7 and s.count('\n') <= newline_limit:
-        await ctx.send(f'```\n{s}```')
-    elif hasattr(ctx, 'filesize_limit') and getsizeof(s) > ctx.filesize_limit:
+    # s can also be a list of str & FixedWidthTable parts: the tables are only rendered once it's known where they go,
+    # and straight into the attachment if it comes to that
+    parts = [s] if isinstance(s, str) else s
+    if (batch_parts := getattr(ctx, 'batch_parts', None)) is not None:
+        # part of a batch, which sends everything as one report at the end
+        batch_parts.append(parts)
+        return
+    size = sum(map(len, parts))
+    newlines = sum(p.count('\n') if isinstance(p, str) else p.newlines for p in parts)
+
+    if size < MAX_MES_SIZE - 7 and newlines <= newline_limit:
+        await ctx.send(f'```\n{"".join(map(str, parts))}```')
+    elif hasattr(ctx, 'filesize_limit') and size > ctx.filesize_limit:
+        with io.BytesIO() as b:
+            _write_parts(b, parts, 500)
+            head = b.getvalue()[:500].decode(errors='ignore')
         await ctx.send(
             '```The result is too big for a Discord file size on this guild. You probably did not mean to get a result this large.\n\nIf you really want this result, contact Wayoshi directly and he can help get it for you. The first 500 characters of the result are included below as a convenience.\n\n'
-            + s[:500]
+            + head
             + '```'
         )
     else:
@@ -277,10 +306,14 @@ async def send_long_mes(ctx, s, *, fn=None, newline_limit=19):
 
         fn = fn or (_command_to_fn(ctx.command) + '_' + datetime.now().isoformat(timespec='seconds'))
 
+        b = io.BytesIO()
+        _write_parts(b, parts)
+        b.seek(0)
+
         if hasattr(ctx, 'bot'):
             # 4/28/22 - pastebin!
-            if getsizeof(s) < 10 * 2**20:
-                link = await ctx.bot.do_pastebin(s, fn)
+            if size < 10 * 2**20:
+                link = await ctx.bot.do_pastebin(b.getvalue().decode(), fn)
             else:
                 link = None
 
@@ -288,7 +321,7 @@ async def send_long_mes(ctx, s, *, fn=None, newline_limit=19):
         else:
             res = None
 
-        await ctx.send(res, file=discord.File(io.StringIO(s), filename=fn + '.txt'))
+        await ctx.send(res, file=discord.File(b, filename=fn + '.txt'))
 
         # if isinstance(ctx.author, discord.Member) and ctx.author.is_on_mobile():
         # 	await ctx.author.send('`Mobile user detected. Sending copy of file, will auto-delete after 5 minutes:`', delete_after=300.)
@@ -344,6 +377,253 @@ class CancelButton(dui.Button):
             await interaction.response.send_message('You are not permitted to cancel.')
 
 
+async def _collect(ctx, queries, q: pl.LazyFrame) -> pl.DataFrame:
+    # through the cog's QueryExecutor when it has one, so these count against its budgets & timeout like its other queries
+    return await queries.collect(ctx, q) if queries else await asyncio.to_thread(q.collect)
+
+
+class PaginatedView(dui.View):
+    """Pages through a big table result. Only the rows of the page being shown are ever collected from q (with
+    queries, if given), and q is let go once the view times out."""
+
+    def __init__(
+        self, ctx, head: str, q, height: int, page_rows: int, render: Callable, queries=None, timeout: float = 600.0
+    ):
+        super().__init__(timeout=timeout)
+        self.ctx = ctx
+        self.queries = queries
+        self.head = head
+        self.q = q
+        self.page_rows = page_rows
+        self.n_pages = -(-height // page_rows)
+        self.render = render
+        self.page = 0
+        self.message = None
+
+    async def content(self):
+        rows = await _collect(self.ctx, self.queries, self.q.slice(self.page * self.page_rows, self.page_rows))
+        self.first.disabled = self.prev.disabled = self.page == 0
+        self.next.disabled = self.last.disabled = self.page == self.n_pages - 1
+        self.position.label = f'{self.page + 1}/{self.n_pages}'
+        return f'```\n{self.head}\n\n{self.render(rows)}```'
+
+    async def turn(self, interaction, page):
+        self.page = page
+        await interaction.response.edit_message(content=await self.content(), view=self)
+
+    @dui.button(emoji='⏮️', style=discord.ButtonStyle.secondary)
+    async def first(self, interaction, button):
+        await self.turn(interaction, 0)
+
+    @dui.button(emoji='◀️', style=discord.ButtonStyle.primary)
+    async def prev(self, interaction, button):
+        await self.turn(interaction, self.page - 1)
+
+    @dui.button(label='1/1', style=discord.ButtonStyle.secondary, disabled=True)
+    async def position(self, interaction, button):
+        pass
+
+    @dui.button(emoji='▶️', style=discord.ButtonStyle.primary)
+    async def next(self, interaction, button):
+        await self.turn(interaction, self.page + 1)
+
+    @dui.button(emoji='⏭️', style=discord.ButtonStyle.secondary)
+    async def last(self, interaction, button):
+        await self.turn(interaction, self.n_pages - 1)
+
+    @dui.button(emoji='📄', label='All', style=discord.ButtonStyle.success)
+    async def whole(self, interaction, button):
+        # the old attachment (+ pastebin), on request
+        button.disabled = True
+        await interaction.response.edit_message(view=self)
+        await send_long_mes(
+            self.ctx, [self.head, '\n\n', self.render(await _collect(self.ctx, self.queries, self.q))], newline_limit=-1
+        )
+
+    async def interaction_check(self, interaction):
+        return interaction.user == self.ctx.author
+
+    async def on_timeout(self):
+        self.q = None
+        if self.message:
+            await self.message.edit(view=None)
+
+
+PAGE_ROWS = 15
+
+
+async def send_long_table(ctx, head: str, q, *, newline_limit=19, queries=None):
+    """send_long_mes(ctx, [head, '\\n\\n', table of q]), except a table too big for one message is sent a page
+    at a time in a PaginatedView rather than as an attachment. q is collected through queries (a QueryExecutor),
+    the cog's own by default, if it has one."""
+    from util_expr import FixedWidthTable  # util_expr imports util
+
+    queries = queries or getattr(ctx.cog, 'queries', None)
+    widths = await (
+        queries.run(ctx, FixedWidthTable.measure, q) if queries else asyncio.to_thread(FixedWidthTable.measure, q)
+    )
+    height = (await _collect(ctx, queries, q.select(pl.len()))).item()
+    line_width = sum(widths) + 2 * (len(widths) - 1)
+    size = len(head) + 2 + (line_width + 1) * (height + 1)
+    page_rows = min(PAGE_ROWS, (MAX_MES_SIZE - 20 - len(head)) // (line_width + 1) - 1)
+
+    if (
+        (size < MAX_MES_SIZE - 7 and head.count('\n') + 2 + height <= newline_limit)
+        or page_rows < 1
+        or hasattr(ctx, 'batch_parts')
+    ):
+        await send_long_mes(ctx, [head, '\n\n', FixedWidthTable(await _collect(ctx, queries, q), widths)])
+    else:
+        view = PaginatedView(ctx, head, q, height, page_rows, lambda rows: str(FixedWidthTable(rows, widths)), queries)
+        view.message = await ctx.send(await view.content(), view=view)
+
+
+class QueryTimeout(commands.CommandError):
+    pass
+
+
+class QueryExecutor:
+    """Runs a cog's blocking (mostly Polars) work off the event loop on a bounded pool of its own, with a budget of
+    concurrent queries per user and per channel and a wall-clock timeout. A LazyFrame collect is interrupted inside
+    Polars when it times out or its command is cancelled; other work can only be abandoned, and still counts against
+    the budget until it actually finishes."""
+
+    def __init__(self, name: str, max_workers: int = 4, per_user: int = 2, per_channel: int = 4, timeout: float = 60.0):
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix=name)
+        self.limits = {commands.BucketType.user: per_user, commands.BucketType.channel: per_channel}
+        self.timeout = timeout
+        self._running = Counter()
+
+    def _acquire(self, ctx):
+        keys = [(commands.BucketType.user, ctx.author.id), (commands.BucketType.channel, ctx.channel.id)]
+        for k in keys:
+            if self._running[k] >= self.limits[k[0]]:
+                raise commands.MaxConcurrencyReached(self.limits[k[0]], k[0])
+        self._running.update(keys)
+        return keys
+
+    def _release(self, keys):
+        self._running.subtract(keys)
+        for k in keys:
+            if not self._running[k]:
+                del self._running[k]
+
+    async def run(self, ctx, func: Callable, *args, timeout: Optional[float] = None, on_cancel: Callable = None, **kwargs):
+        """await func(*args, **kwargs) in the pool. on_cancel is called if it's still running when given up on."""
+        if (batch := getattr(ctx, 'query_batch', None)) is not None:
+            return await batch.submit('run', partial(func, *args, **kwargs))
+        keys = self._acquire(ctx)
+        loop = asyncio.get_running_loop()
+        try:
+            f = self._pool.submit(func, *args, **kwargs)
+        except BaseException:
+            self._release(keys)
+            raise
+        # released when the work is really done (or never started), not when it's given up on
+        f.add_done_callback(lambda _: loop.call_soon_threadsafe(self._release, keys))
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(f), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            raise QueryTimeout(f'Gave up after {timeout or self.timeout:g} seconds. Try narrowing the query down.') from None
+        finally:
+            if not f.done() and on_cancel:
+                on_cancel()
+
+    async def collect(self, ctx, q: pl.LazyFrame, timeout: Optional[float] = None) -> pl.DataFrame:
+        if (batch := getattr(ctx, 'query_batch', None)) is not None:
+            return await batch.submit('collect', q)
+        cancelled = threading.Event()
+        running = []
+
+        def collect():
+            if cancelled.is_set():
+                raise asyncio.CancelledError
+            running.append(q.collect(background=True))
+            if cancelled.is_set():
+                running[0].cancel()
+            return running[0].fetch_blocking()
+
+        def cancel():
+            cancelled.set()
+            if running:
+                running[0].cancel()
+
+        return await self.run(ctx, collect, timeout=timeout, on_cancel=cancel)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class QueryBatch:
+    """Plans the queries of several commands together. Each command runs as its own task (see track) with a context
+    whose query_batch is this; whenever every one of them is either done or waiting on a query, everything waiting
+    is run as one job on the executor, with all the LazyFrames in one pl.collect_all so the subplans they share
+    only run once."""
+
+    def __init__(self, executor: QueryExecutor, ctx):
+        self.executor = executor
+        self.ctx = ctx
+        self.live = 0
+        self.pending = []
+        self.flushes = 0
+        self._tasks = set()
+
+    def track(self, coro) -> asyncio.Task:
+        self.live += 1
+        task = asyncio.create_task(coro)
+        task.add_done_callback(self._done)
+        return task
+
+    def _done(self, task):
+        self.live -= 1
+        self._maybe_flush()
+
+    async def submit(self, kind: str, item):
+        f = asyncio.get_running_loop().create_future()
+        self.pending.append((kind, item, f))
+        self._maybe_flush()
+        return await f
+
+    def _maybe_flush(self):
+        if self.pending and len(self.pending) == self.live:
+            items, self.pending = self.pending, []
+            task = asyncio.create_task(self._flush(items))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _flush(self, items):
+        self.flushes += 1
+        try:
+            results = await self.executor.run(self.ctx, self._run_all, [(kind, item) for kind, item, _ in items])
+        except Exception as e:
+            results = [(False, e)] * len(items)
+        for (_, _, f), (ok, r) in zip(items, results):
+            if not f.done():
+                f.set_result(r) if ok else f.set_exception(r)
+
+    @staticmethod
+    def _run_all(items):
+        results = [None] * len(items)
+        lazy = [i for i, (kind, _) in enumerate(items) if kind == 'collect']
+        try:
+            for i, df in zip(lazy, pl.collect_all([items[i][1] for i in lazy])):
+                results[i] = (True, df)
+        except Exception:
+            # one bad query fails them all, so sort out whose it was
+            for i in lazy:
+                try:
+                    results[i] = (True, items[i][1].collect())
+                except Exception as e:
+                    results[i] = (False, e)
+        for i, (kind, func) in enumerate(items):
+            if kind == 'run':
+                try:
+                    results[i] = (True, func())
+                except Exception as e:
+                    results[i] = (False, e)
+        return results
+
+
 from discord import app_commands
 
 
@@ -360,7 +640,6 @@ from sympy.logic.boolalg import And as BAnd
 from sympy.logic.boolalg import Or as BOr
 from sympy.parsing.sympy_parser import parse_expr
 
-
 _COND_REPLACEMENTS = (
     ('not', '~'),
     ('and', '&'),
@@ -12,11 +12,14 @@ from more_itertools import value_chain
 import polars as pl
 import polars.selectors as cs
 
+from compendium import WORD_REGEX, TrigramIndex, WordIndex
 from dropboxwayo import dropboxwayo
 from util_expr import (
     build_int_expression,
     build_date_expression,
     build_dt_q_expression,
+    compile_logic,
+    condition_aliases,
     transform_str_to_dts,
 )
 
@@ -368,7 +371,19 @@ _letters_mapping = {
     'ALL': string.ascii_uppercase,
     'VOWEL': 'AEIOU',
 }
-_word_regex = r"\b[A-Z-'\.]+\b"
+
+
+def _letter_count_expr(letters: str, unique: bool = False) -> pl.Expr:
+    # column arithmetic over the _A.._Z letter counts WheelCompendium computes at load
+    cols = pl.col([f'_{c}' for c in letters])
+    return pl.sum_horizontal(cols > 0 if unique else cols.cast(pl.UInt16))
+
+
+def _letter_mult_expr(letters: str, mults: str) -> pl.Expr:
+    # how many of letters appear exactly a multiple in mults times
+    return pl.sum_horizontal(
+        (pl.col(f'_{c}') > 0) & build_int_expression(pl.col(f'_{c}'), [mults], expr_only=True) for c in letters
+    )
 
 
 def _ordinal_adjust(idx):
@@ -382,7 +397,7 @@ def _ordinal_adjust(idx):
     return idx, sub_cd
 
 
-def build_puzzle_search_expr(options):
+def build_puzzle_search_expr(options, word_index: WordIndex, trigram_index: dict[str, TrigramIndex]):
     f_exprs = []
     cond_descriptions = []
 
@@ -443,7 +458,10 @@ def build_puzzle_search_expr(options):
                         col = 'BONUS'
 
                 if p_q.startswith('L'):
-                    f = pl.col(col).cast(str).str.contains(lit, literal=True)
+                    if col in trigram_index:
+                        f = trigram_index[col].rows(lit, literal=True)
+                    else:
+                        f = pl.col(col).cast(str).str.contains(lit, literal=True)
                     cd = f'{col} contains "{lit}"'
                 else:
                     f = pl.col(col).cast(str) == lit
@@ -468,7 +486,7 @@ def build_puzzle_search_expr(options):
                     f, cd, p = build_int_expression(pl.col(col).str.count_matches(regex), e)
                     cd = f'{col} matches "{regex}" {cd} time' + ('s' if p else '')
                 else:
-                    f = pl.col(col).str.contains(regex)
+                    f = trigram_index[col].rows(regex)
                     cd = f'{col} matches "{regex}"'
             case ['RD' | 'ROUND' | 'R' | 'CAT' | 'CATEGORY' as col, regex]:
                 col = COL_NAME_REMAPPING.get(col, col)
@@ -514,13 +532,10 @@ def build_puzzle_search_expr(options):
                     f, cd = build_date_expression(pl.col(col), e, options.dateFormat)
                     cd = f'{col} is {cd}'
             case ['LENGTH' | 'LC' | 'L', *e]:
-                f, cd, _ = build_int_expression(pl.col('PUZZLE').str.extract_all('[A-Z]').list.len(), e)
+                f, cd, _ = build_int_expression(_letter_count_expr(string.ascii_uppercase), e)
                 cd = f'length is {cd}'
             case ['LENGTH_UNIQUE' | 'LCU' | 'LU', *e]:
-                f, cd, _ = build_int_expression(
-                    pl.col('PUZZLE').str.extract_all('[A-Z]').list.unique().list.len(),
-                    e,
-                )
+                f, cd, _ = build_int_expression(_letter_count_expr(string.ascii_uppercase, unique=True), e)
                 cd = f'total number of unique letters is {cd}'
             case ['COUNT' | 'C' | 'COUNT_UNIQUE' | 'CU' as col, letters, *e]:
                 if letters in _letters_mapping:
@@ -528,41 +543,22 @@ def build_puzzle_search_expr(options):
                 elif not re.match('[A-Z]+', letters) or not len(set(letters)) == len(letters):
                     raise ValueError(f'Malformed letter string (must be all A-Z and all unique): {letters}')
 
-                base_expr = pl.col('PUZZLE').str.extract_all('[A-Z]')
-                if 'U' in col:
-                    base_expr = base_expr.list.unique()
-                    extra = ' unique'
-                else:
-                    extra = ''
-
-                f, cd, _ = build_int_expression(
-                    base_expr.list.eval(pl.element().is_in(list(letters)), parallel=True).list.sum(),
-                    e,
-                )
+                extra = ' unique' if 'U' in col else ''
+                f, cd, _ = build_int_expression(_letter_count_expr(letters, unique='U' in col), e)
                 cd = f'total{extra} number of {letters} is {cd}'
             case ['WORD_COUNT' | 'WC', *e]:
-                f, cd, _ = build_int_expression(pl.col('PUZZLE').str.count_matches(_word_regex), e)
+                f, cd, _ = build_int_expression(pl.col('PUZZLE').str.count_matches(WORD_REGEX), e)
                 cd = f'total word count is {cd}'
             case ['WORD' | 'W', regex]:
                 regex = re.sub(r'\\\w', lambda m: m.group().lower(), regex)
-                f = (
-                    pl.col('PUZZLE')
-                    .str.extract_all(_word_regex)
-                    .list.eval(pl.element().str.contains(regex), parallel=True)
-                    .list.contains(True)
-                )
+                f = word_index.rows(regex)
                 cd = f'any word matches "{regex}"'
             case ['WORD' | 'W', word, 'LITERAL' | 'LIT' | 'L' | 'EXACT' | 'E' as w_q]:
                 if w_q.startswith('L'):
-                    f = (
-                        pl.col('PUZZLE')
-                        .str.extract_all(_word_regex)
-                        .list.eval(pl.element().str.contains(word, literal=True), parallel=True)
-                        .list.contains(True)
-                    )
+                    f = word_index.rows(word, literal=True)
                     cd = f'any word contains "{word}"'
                 else:
-                    f = pl.col('PUZZLE').str.extract_all(_word_regex).list.contains(word)
+                    f = word_index.rows(word, exact=True)
                     cd = f'any word is exactly "{word}"'
             case ['WORD' | 'W', regex, idx]:
                 idx = int(idx)
@@ -575,7 +571,7 @@ def build_puzzle_search_expr(options):
                     sub_cd = ordinal(-idx) + '-to-last' if idx < -1 else 'last'
                 regex = re.sub(r'\\\w', lambda m: m.group().lower(), regex)
 
-                f = pl.col('PUZZLE').str.extract_all(_word_regex).list.get(idx).str.contains(regex)
+                f = word_index.rows(regex, idx=idx)
                 cd = f'{sub_cd} word matches "{regex}"'
             case [
                 'WORD' | 'W',
@@ -585,13 +581,11 @@ def build_puzzle_search_expr(options):
             ]:
                 idx, sub_cd = _ordinal_adjust(int(idx))
 
-                base_expr = pl.col('PUZZLE').str.extract_all(_word_regex).list.get(idx)
-
                 if w_q.startswith('L'):
-                    f = base_expr.str.contains(word, literal=True)
+                    f = word_index.rows(word, literal=True, idx=idx)
                     cd = f'{sub_cd} word contains "{word}"'
                 else:
-                    f = base_expr == word
+                    f = word_index.rows(word, exact=True, idx=idx)
                     cd = f'{sub_cd} word is exactly "{word}"'
             case ['MULT' | 'M', letters, mults, *e]:
                 if letters in _letters_mapping:
@@ -607,22 +601,7 @@ def build_puzzle_search_expr(options):
                 if not e:
                     e = ['>=1']
 
-                f, cd, _ = build_int_expression(
-                    pl.col('_lc')
-                    .list.eval(
-                        (pl.element().struct.field('').is_in(list(letters)))
-                        & (
-                            build_int_expression(
-                                pl.element().struct.field('count'),
-                                [mults],
-                                expr_only=True,
-                            )
-                        ),
-                        parallel=True,
-                    )
-                    .list.sum(),
-                    e,
-                )
+                f, cd, _ = build_int_expression(_letter_mult_expr(letters, mults), e)
                 cd = f'number of {mult_cd} of "{letters}" is {cd}'
             case ['PP' | 'PR' | 'RL' as col]:
                 if options.time != 'syndicated' and not (
@@ -683,22 +662,18 @@ def build_puzzle_search_expr(options):
         f_exprs.append(f)
         cond_descriptions.append(cd)
 
+    total_expr = compile_logic(options.logicExpr, condition_aliases(f_exprs))(f_exprs)
     if options.logicExpr == 'all':
-        total_expr = pl.all_horizontal(f_exprs)
         expr_str = ' all of'
     elif options.logicExpr == 'any':
-        total_expr = pl.any_horizontal(f_exprs)
         expr_str = ' any of'
     else:
-        l = locals()
-        l |= {letter: fe for fe, letter in zip(f_exprs, string.ascii_uppercase)}
-        total_expr = eval(re.sub('([A-Z])', r'(\1)', options.logicExpr))
         expr_str = f'\n{options.logicExpr}; where'
 
     return total_expr, expr_str, cond_descriptions, join
 
 
-def build_choices_search_expr(options):
+def build_choices_search_expr(options, word_index: WordIndex, trigram_index: dict[str, TrigramIndex]):
     f_exprs = []
     cond_descriptions = []
 
@@ -734,7 +709,7 @@ def build_choices_search_expr(options):
                     f, cd, p = build_int_expression(pl.col(col).str.count_matches(regex), e)
                     cd = f'{col} matches "{regex}" {cd} time' + ('s' if p else '')
                 else:
-                    f = pl.col(col).str.contains(regex)
+                    f = trigram_index[col].rows(regex)
                     cd = f'{col} matches "{regex}"'
             case [
                 'CHOSEN' | 'CHOICE1' | 'C1' | 'CHOICE2' | 'C2' | 'CHOICE3' | 'C3' as col,
@@ -816,13 +791,10 @@ def build_choices_search_expr(options):
                 f, cd = build_date_expression(pl.col(col), e, options.dateFormat)
                 cd = f'{col} is {cd}'
             case ['LENGTH' | 'LC' | 'L', *e]:
-                f, cd, _ = build_int_expression(pl.col('PUZZLE').str.extract_all('[A-Z]').list.len(), e)
+                f, cd, _ = build_int_expression(_letter_count_expr(string.ascii_uppercase), e)
                 cd = f'length is {cd}'
             case ['LENGTH_UNIQUE' | 'LCU' | 'LU', *e]:
-                f, cd, _ = build_int_expression(
-                    pl.col('PUZZLE').str.extract_all('[A-Z]').list.unique().list.len(),
-                    e,
-                )
+                f, cd, _ = build_int_expression(_letter_count_expr(string.ascii_uppercase, unique=True), e)
                 cd = f'total number of unique letters is {cd}'
             case ['COUNT' | 'C' | 'COUNT_UNIQUE' | 'CU' as col, letters, *e]:
                 if letters in _letters_mapping:
@@ -830,41 +802,22 @@ def build_choices_search_expr(options):
                 elif not re.match('[A-Z]+', letters) or not len(set(letters)) == len(letters):
                     raise ValueError(f'Malformed letter string (must be all A-Z and all unique): {letters}')
 
-                base_expr = pl.col('PUZZLE').str.extract_all('[A-Z]')
-                if 'U' in col:
-                    base_expr = base_expr.list.unique()
-                    extra = ' unique'
-                else:
-                    extra = ''
-
-                f, cd, _ = build_int_expression(
-                    base_expr.list.eval(pl.element().is_in(list(letters)), parallel=True).list.sum(),
-                    e,
-                )
+                extra = ' unique' if 'U' in col else ''
+                f, cd, _ = build_int_expression(_letter_count_expr(letters, unique='U' in col), e)
                 cd = f'total{extra} number of {letters} is {cd}'
             case ['WORD_COUNT' | 'WC', *e]:
-                f, cd, _ = build_int_expression(pl.col('PUZZLE').str.count_matches(_word_regex), e)
+                f, cd, _ = build_int_expression(pl.col('PUZZLE').str.count_matches(WORD_REGEX), e)
                 cd = f'total word count is {cd}'
             case ['WORD' | 'W', regex]:
                 regex = re.sub(r'\\\w', lambda m: m.group().lower(), regex)
-                f = (
-                    pl.col('PUZZLE')
-                    .str.extract_all(_word_regex)
-                    .list.eval(pl.element().str.contains(regex), parallel=True)
-                    .list.contains(True)
-                )
+                f = word_index.rows(regex)
                 cd = f'any word matches "{regex}"'
             case ['WORD' | 'W', word, 'LITERAL' | 'LIT' | 'L' | 'EXACT' | 'E' as w_q]:
                 if w_q.startswith('L'):
-                    f = (
-                        pl.col('PUZZLE')
-                        .str.extract_all(_word_regex)
-                        .list.eval(pl.element().str.contains(word, literal=True), parallel=True)
-                        .list.contains(True)
-                    )
+                    f = word_index.rows(word, literal=True)
                     cd = f'any word contains "{word}"'
                 else:
-                    f = pl.col('PUZZLE').str.extract_all(_word_regex).list.contains(word)
+                    f = word_index.rows(word, exact=True)
                     cd = f'any word is exactly "{word}"'
             case ['WORD' | 'W', regex, idx]:
                 idx = int(idx)
@@ -877,7 +830,7 @@ def build_choices_search_expr(options):
                     sub_cd = ordinal(-idx) + '-to-last' if idx < -1 else 'last'
                 regex = re.sub(r'\\\w', lambda m: m.group().lower(), regex)
 
-                f = pl.col('PUZZLE').str.extract_all(_word_regex).list.get(idx).str.contains(regex)
+                f = word_index.rows(regex, idx=idx)
                 cd = f'{sub_cd} word matches "{regex}"'
             case [
                 'WORD' | 'W',
@@ -887,13 +840,11 @@ def build_choices_search_expr(options):
             ]:
                 idx, sub_cd = _ordinal_adjust(int(idx))
 
-                base_expr = pl.col('PUZZLE').str.extract_all(_word_regex).list.get(idx)
-
                 if w_q.startswith('L'):
-                    f = base_expr.str.contains(word, literal=True)
+                    f = word_index.rows(word, literal=True, idx=idx)
                     cd = f'{sub_cd} word contains "{word}"'
                 else:
-                    f = base_expr == word
+                    f = word_index.rows(word, exact=True, idx=idx)
                     cd = f'{sub_cd} word is exactly "{word}"'
             case ['MULT' | 'M', letters, mults, *e]:
                 if letters in _letters_mapping:
@@ -909,22 +860,7 @@ def build_choices_search_expr(options):
                 if not e:
                     e = ['>=1']
 
-                f, cd, _ = build_int_expression(
-                    pl.col('_lc')
-                    .list.eval(
-                        (pl.element().struct.field('').is_in(list(letters)))
-                        & (
-                            build_int_expression(
-                                pl.element().struct.field('count'),
-                                [mults],
-                                expr_only=True,
-                            )
-                        ),
-                        parallel=True,
-                    )
-                    .list.sum(),
-                    e,
-                )
+                f, cd, _ = build_int_expression(_letter_mult_expr(letters, mults), e)
                 cd = f'number of {mult_cd} of "{letters}" is {cd}'
             case _:
                 raise ValueError(f'Malformed condition: {cond}')
@@ -932,16 +868,12 @@ def build_choices_search_expr(options):
         f_exprs.append(f)
         cond_descriptions.append(cd)
 
+    total_expr = compile_logic(options.logicExpr, condition_aliases(f_exprs))(f_exprs)
     if options.logicExpr == 'all':
-        total_expr = pl.all_horizontal(f_exprs)
         expr_str = ' all of'
     elif options.logicExpr == 'any':
-        total_expr = pl.any_horizontal(f_exprs)
         expr_str = ' any of'
     else:
-        l = locals()
-        l |= {letter: fe for fe, letter in zip(f_exprs, string.ascii_uppercase)}
-        total_expr = eval(re.sub('([A-Z])', r'(\1)', options.logicExpr))
         expr_str = f'\n{options.logicExpr}; where'
 
     return total_expr, expr_str, cond_descriptions
@@ -1053,16 +985,12 @@ def build_sched_search_expr(options):
         f_exprs.append(f)
         cond_descriptions.append(cd)
 
+    total_expr = compile_logic(options.logicExpr, condition_aliases(f_exprs))(f_exprs)
     if options.logicExpr == 'all':
-        total_expr = pl.all_horizontal(f_exprs)
         expr_str = ' all of'
     elif options.logicExpr == 'any':
-        total_expr = pl.any_horizontal(f_exprs)
         expr_str = ' any of'
     else:
-        l = locals()
-        l |= {letter: fe for fe, letter in zip(f_exprs, string.ascii_uppercase)}
-        total_expr = eval(re.sub('([A-Z])', r'(\1)', options.logicExpr))
         expr_str = f'\n{options.logicExpr}; where'
 
     return total_expr, expr_str, cond_descriptions
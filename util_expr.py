@@ -1,13 +1,17 @@
+import io
 import re
+from collections import Counter
 from functools import reduce
 from datetime import datetime, timedelta
-from operator import attrgetter, or_
-from typing import Any, Union, Optional, TypeVar
+from operator import and_, attrgetter, eq, or_, xor
+from typing import Any, Sequence, Union, Optional, TypeVar
 
 import polars as pl
 import polars.selectors as cs
 from cachetools.func import lfu_cache
 from datetime_matcher import DatetimeMatcher
+from sympy.logic.boolalg import And, Not, Or, Xor
+from sympy.parsing.sympy_parser import parse_expr
 
 from util import SCHEDULER_TZ
 
@@ -32,6 +36,59 @@ def pretty_print_polars(df: pl.DataFrame | pl.Series):
     return _ppp_newline.sub(r'\1', str(df))
 
 
+class FixedWidthTable:
+    """df laid out the way pretty_print_polars prints it under the bot's table config (cells right-aligned to their
+    column, two spaces between columns, strings cut at 100 characters), but only rendered when written, a batch of
+    rows at a time. Every line is the same width, so the size of the whole text is known up front."""
+
+    MAX_STR_LEN = 100
+    BATCH_SIZE = 2_000
+
+    def __init__(self, df: pl.DataFrame, widths: Optional[list[int]] = None):
+        # widths: lay out at these instead (e.g. a page of a bigger table at that table's widths)
+        self.df = df
+        self._cells = [self._cell(col, dtype) for col, dtype in df.schema.items()]
+        self.widths = widths or self.measure(df.lazy())
+        self.line_width = sum(self.widths) + 2 * (len(self.widths) - 1)
+
+    @classmethod
+    def measure(cls, q: pl.LazyFrame) -> list[int]:
+        """The column widths q would be laid out at, as one aggregation (q itself is never collected)."""
+        schema = q.collect_schema()
+        lens = q.select(cls._cell(col, dtype).str.len_chars().max() for col, dtype in schema.items()).collect().row(0)
+        return [max(len(col), n or 0) for col, n in zip(schema.names(), lens)]
+
+    @classmethod
+    def _cell(cls, col, dtype):
+        e = pl.col(col).cast(pl.String)
+        if dtype == pl.String:
+            e = pl.when(e.str.len_chars() > cls.MAX_STR_LEN).then(e.str.slice(0, cls.MAX_STR_LEN) + '…').otherwise(e)
+        return e.fill_null('null')
+
+    def __len__(self):
+        return (self.line_width + 1) * (self.df.height + 1) - 1
+
+    @property
+    def newlines(self):
+        return self.df.height
+
+    def write(self, fp, n_rows: Optional[int] = None):
+        """Write the header and the first n_rows rows (default all) to the binary stream fp."""
+        fp.write('  '.join(col.rjust(w) for col, w in zip(self.df.columns, self.widths)).encode())
+        df = self.df.head(n_rows) if n_rows is not None else self.df
+        for i in range(0, df.height, self.BATCH_SIZE):
+            lines = df.slice(i, self.BATCH_SIZE).select(
+                pl.concat_str([c.str.pad_start(w) for c, w in zip(self._cells, self.widths)], separator='  ')
+            )
+            fp.write(b'\n')
+            fp.write('\n'.join(lines.to_series()).encode())
+
+    def __str__(self):
+        with io.BytesIO() as b:
+            self.write(b)
+            return b.getvalue().decode()
+
+
 _number_logic_to_str = {
     '=': '',
     '!=': 'not',
@@ -288,3 +345,107 @@ def transform_str_to_dts(e, dateFormat):
         )
         for ee in e
     ]
+
+
+# logic expressions. a plan is a tree of condition indices and (op, args) nodes: & and | over frozensets, ^ over a tuple,
+# ~ over a single node. conditions can come back null, so only rewrites that also hold for polars' three-valued logic
+# are made (idempotence, absorption, distributivity) - never A | ~A -> True and the like.
+
+_LOGIC_OPS = {'&': and_, '|': or_, '^': xor}
+
+
+def _logic_node(op, args):
+    return next(iter(args)) if len(args) == 1 else (op, frozenset(args))
+
+
+def _logic_tree(sym, aliases):
+    if sym.is_Symbol:
+        if (i := ord(sym.name) - ord('a')) >= len(aliases):
+            raise ValueError(f'No condition {sym.name.upper()} given for the logical expression.')
+        return aliases[i]
+    elif sym.func is Not:
+        return '~', _logic_tree(sym.args[0], aliases)
+    elif sym.func is Xor:
+        return '^', tuple(_logic_tree(a, aliases) for a in sym.args)
+    elif sym.func in (And, Or):
+        return '&' if sym.func is And else '|', frozenset(_logic_tree(a, aliases) for a in sym.args)
+    raise ValueError(f'Logical expression is always {str(sym).lower()}.')
+
+
+def _simplify_logic(node):
+    if type(node) is int:
+        return node
+    op, args = node
+    if op == '~':
+        inner = _simplify_logic(args)
+        return inner[1] if type(inner) is tuple and inner[0] == '~' else ('~', inner)
+    elif op == '^':
+        return op, tuple(_simplify_logic(a) for a in args)
+
+    flat = set()
+    for a in map(_simplify_logic, args):
+        flat |= a[1] if type(a) is tuple and a[0] == op else {a}
+    dual = '|' if op == '&' else '&'
+    terms = {a: a[1] if type(a) is tuple and a[0] == dual else frozenset((a,)) for a in flat}
+
+    # A | (A & B) -> A
+    flat = {a for a in flat if not any(t < terms[a] for t in terms.values())}
+
+    # (A & B) | (A & C) -> A & (B | C), most shared first
+    counts = Counter(x for a in flat if len(terms[a]) > 1 for x in terms[a])
+    if counts and (shared := counts.most_common(1)[0])[1] > 1:
+        x = shared[0]
+        sharing = {a for a in flat if len(terms[a]) > 1 and x in terms[a]}
+        factored = (dual, frozenset((x, _logic_node(op, [_logic_node(dual, terms[a] - {x}) for a in sharing]))))
+        return _simplify_logic(_logic_node(op, (flat - sharing) | {factored}))
+
+    return _logic_node(op, flat)
+
+
+def _logic_leaves(node):
+    if type(node) is int:
+        return {node}
+    op, args = node
+    return _logic_leaves(args) if op == '~' else set().union(*map(_logic_leaves, args))
+
+
+class LogicPlan:
+    """A compiled logic expression over conditions A-Z. Calling it on the conditions (Polars expressions or boolean
+    Series, anything indexable by condition number) combines them; only the ones in leaves are ever read."""
+
+    def __init__(self, tree):
+        self.tree = tree
+        self.leaves = frozenset(_logic_leaves(tree))
+
+    def __call__(self, conds):
+        return self._emit(self.tree, conds)
+
+    def _emit(self, node, conds):
+        if type(node) is int:
+            return conds[node]
+        op, args = node
+        if op == '~':
+            return ~self._emit(args, conds)
+        return reduce(_LOGIC_OPS[op], (self._emit(a, conds) for a in sorted(args, key=repr)))
+
+    def __repr__(self):
+        return f'LogicPlan({self.tree!r})'
+
+
+@lfu_cache(maxsize=256)
+def compile_logic(logic_expr: str, aliases: tuple[int, ...]) -> LogicPlan:
+    """Parse, simplify and compile logic_expr ('all', 'any' or a custom expression as returned by logic_expression)
+    over len(aliases) conditions, where aliases[i] is the first condition identical to condition i (see
+    condition_aliases) so that repeats are only evaluated once."""
+    if logic_expr in ('all', 'any'):
+        tree = _logic_node('&' if logic_expr == 'all' else '|', set(aliases))
+    else:
+        tree = _logic_tree(parse_expr(logic_expr.lower()), aliases)
+    return LogicPlan(_simplify_logic(tree))
+
+
+def condition_aliases(conds: Sequence) -> tuple[int, ...]:
+    """For every condition, the index of the first one identical to it. Polars expressions are compared structurally,
+    anything else (e.g. a key for the condition) with ==."""
+    same = (lambda a, b: a.meta.eq(b)) if conds and isinstance(conds[0], pl.Expr) else eq
+    return tuple(next(j for j in range(i + 1) if same(conds[j], c)) for i, c in enumerate(conds))
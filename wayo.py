@@ -6,6 +6,7 @@
 
 import asyncio
 import re
+import signal
 import sys
 import logging
 import traceback
@@ -108,6 +109,12 @@ class WayoPyBot(commands.Bot):
         self.SCHEDULER = AsyncIOScheduler(timezone=SCHEDULER_TZ)
         self.SCHEDULER.start()
 
+        # a stop/restart sends SIGTERM, shut down properly so unsaved lineup edits get written out
+        try:
+            self.loop.add_signal_handler(signal.SIGTERM, lambda: asyncio.create_task(self.close()))
+        except NotImplementedError:  # windows
+            pass
+
         if not DEBUG:
             # @self.scheduler.scheduled_job('date', run_date=datetime.now(tz=self.usetz) + dt)
             # @self.SCHEDULER.scheduled_job('cron', hour='5', minute='30')
@@ -234,6 +241,11 @@ class WayoPyBot(commands.Bot):
             await self.get_cog('Clue').cog_unload()
         except:
             pass
+        try:
+            if cs := self.get_cog('TPIRLineups').cs:
+                await asyncio.to_thread(cs.close)
+        except:
+            pass
         await super().close()
         await self.asession.close()
         self.SCHEDULER.shutdown(wait=False)